@@ -0,0 +1,226 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game05 - Connect Four
+#  Last updated: 10/18/26
+#  Description: This program implements a bitboard Connect Four position that the AI bots search on
+
+# A position is stored as two bitmaps: the pieces of the player to move and every occupied cell. Each column uses
+# ROWS + 1 bits, counted from the bottom of the board, and the extra bit on top of every column is always empty so
+# that shifting a line of pieces never runs from one column into the next. Playing a column adds its bottom bit to the
+# occupied mask (the carry lands on the lowest empty cell), and four in a row in any direction is found with two shifts
+# and two ANDs per direction instead of walking the board.
+from array import array
+
+# Constants for board size
+ROWS = 6
+COLS = 7
+HEIGHT = ROWS + 1  # Bits per column: the playable cells plus an always empty sentinel bit
+
+# Column masks: the bottom cell, the top cell and every playable cell of each column
+BOTTOM_MASKS = [1 << (col * HEIGHT) for col in range(COLS)]
+TOP_MASKS = [1 << (col * HEIGHT + ROWS - 1) for col in range(COLS)]
+COLUMN_MASKS = [((1 << ROWS) - 1) << (col * HEIGHT) for col in range(COLS)]
+BOTTOM_ROW = sum(BOTTOM_MASKS)
+BOARD_MASK = BOTTOM_ROW * ((1 << ROWS) - 1)  # Every playable cell
+CENTER_MASK = COLUMN_MASKS[COLS // 2]
+
+# Transposition table entry flags (EMPTY marks an unused slot)
+EMPTY = 0
+EXACT = 1
+LOWER = 2  # The value is a lower bound (the search failed high)
+UPPER = 3  # The value is an upper bound (the search failed low)
+TABLE_SIZE = 262139  # Slots in a transposition table (a prime, so keys spread over every slot)
+
+# Bit distance between neighbouring cells of a line
+VERTICAL = 1
+HORIZONTAL = HEIGHT
+DIAGONAL = HEIGHT + 1  # Up and to the right
+ANTI_DIAGONAL = HEIGHT - 1  # Down and to the right
+DIRECTIONS = (VERTICAL, HORIZONTAL, DIAGONAL, ANTI_DIAGONAL)
+
+# Lowest cell of every window of four cells that fits on the board, for each direction
+WINDOW_STARTS = {shift: BOARD_MASK & (BOARD_MASK >> shift) & (BOARD_MASK >> 2 * shift) & (BOARD_MASK >> 3 * shift)
+                 for shift in DIRECTIONS}
+
+
+# Returns the bit of a cell (rows are counted from the bottom)
+def cell_bit(row, col):
+    return 1 << (col * HEIGHT + row)
+
+
+# Returns the mask of a row of the board (counted from the bottom)
+def row_mask(row):
+    return BOTTOM_ROW << row
+
+
+# Counts the set bits of a bitmap
+def popcount(bitmap):
+    return bitmap.bit_count()
+
+
+# Checks if a bitmap of pieces contains four in a row in any direction
+def has_four(pieces):
+    for shift in DIRECTIONS:
+        pairs = pieces & (pieces >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+# Returns the starts of the windows in one direction where pieces has four, three or two pieces and others has none
+def count_windows(pieces, others, shift, starts):
+    # Add up the four cells of every window at once, one bit of the sum per bitmap
+    a, b, c, d = pieces, pieces >> shift, pieces >> 2 * shift, pieces >> 3 * shift
+    ones = a ^ b ^ c ^ d
+    carry = (a ^ b) & (c ^ d)
+    twos = (a & b) ^ (c & d) ^ carry
+    fours = a & b & c & d
+    open_windows = starts & ~(others | (others >> shift) | (others >> 2 * shift) | (others >> 3 * shift))
+    return fours & starts, ones & twos & open_windows, twos & ~ones & open_windows
+
+
+# Scores every window of four cells: scores = (four pieces, three pieces and an empty cell, two pieces and two empty
+# cells), added for the windows of mine and subtracted for the windows of theirs. Only the given directions are scored
+def window_score(mine, theirs, scores, directions=DIRECTIONS):
+    four_score, three_score, two_score = scores
+    score = 0
+    for shift in directions:
+        starts = WINDOW_STARTS[shift]
+        my_fours, my_threes, my_twos = count_windows(mine, theirs, shift, starts)
+        their_fours, their_threes, their_twos = count_windows(theirs, mine, shift, starts)
+        score += (four_score * (popcount(my_fours) - popcount(their_fours)) +
+                  three_score * (popcount(my_threes) - popcount(their_threes)) +
+                  two_score * (popcount(my_twos) - popcount(their_twos)))
+    return score
+
+
+# Connect Four position made of two bitmaps, played and unplayed in place
+class Position:
+    def __init__(self, current=0, mask=0, moves=0, player=1):
+        self.current = current  # Pieces of the player to move
+        self.mask = mask  # Every occupied cell
+        self.moves = moves  # Number of pieces on the board
+        self.player = player  # Player to move (1 = Red, 2 = Yellow)
+
+    # Builds a position from a list-of-lists board (row 0 at the top, 0 = empty, 1 = Red, 2 = Yellow)
+    @classmethod
+    def from_board(cls, board, player):
+        current = 0
+        mask = 0
+        moves = 0
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = board[row][col]
+                if piece:
+                    bit = cell_bit(ROWS - 1 - row, col)
+                    mask |= bit
+                    moves += 1
+                    if piece == player:
+                        current |= bit
+        return cls(current, mask, moves, player)
+
+    # Returns a copy of the position
+    def copy(self):
+        return Position(self.current, self.mask, self.moves, self.player)
+
+    # Returns the pieces of a player
+    def pieces(self, player):
+        return self.current if player == self.player else self.current ^ self.mask
+
+    # Checks if a column has an empty cell
+    def can_play(self, col):
+        return not self.mask & TOP_MASKS[col]
+
+    # Returns the columns that have an empty cell
+    def valid_columns(self):
+        return [col for col in range(COLS) if not self.mask & TOP_MASKS[col]]
+
+    # Returns the bit of the lowest empty cell of a column
+    def move_bit(self, col):
+        return (self.mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col]
+
+    # Returns the number of pieces in a column
+    def height(self, col):
+        return popcount(self.mask & COLUMN_MASKS[col])
+
+    # Drops a piece of the player to move in a column and returns its bit (pass it to undo to take the piece back)
+    def play(self, col):
+        move = (self.mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col]
+        self.current ^= self.mask  # The other player moves next
+        self.mask |= move
+        self.moves += 1
+        self.player = 3 - self.player
+        return move
+
+    # Takes back the piece played with the given bit
+    def undo(self, move):
+        self.player = 3 - self.player
+        self.moves -= 1
+        self.mask ^= move
+        self.current ^= self.mask
+
+    # Checks if the player to move would win by playing a column
+    def is_winning_move(self, col):
+        return has_four(self.current | self.move_bit(col))
+
+    # Checks if a player has four in a row
+    def wins(self, player):
+        return has_four(self.pieces(player))
+
+    # Checks if every cell is occupied
+    def is_full(self):
+        return self.moves == ROWS * COLS
+
+    # Returns a key that identifies the position (the pieces and the player to move)
+    def key(self):
+        return self.current + self.mask
+
+
+# Fixed-size transposition table of search results indexed by position key. Each slot holds the key, value, depth,
+# bound flag and best column of one position in flat typed arrays, so the table never grows. A slot is overwritten by
+# the same position, by a search at least as deep, or by any search if its entry was stored before the current move
+class TranspositionTable:
+    def __init__(self, size=TABLE_SIZE):
+        self.size = size
+        self.keys = array("Q", [0]) * size
+        self.values = array("q", [0]) * size
+        self.depths = array("b", [0]) * size
+        self.flags = array("B", [EMPTY]) * size
+        self.moves = array("b", [-1]) * size
+        self.generations = array("I", [0]) * size
+        self.generation = 0  # Counts searches so entries of earlier moves can be replaced first
+
+    # Starts a new search (entries of earlier searches stay readable but lose their slot to any new entry)
+    def new_search(self):
+        self.generation += 1
+
+    # Removes every entry (for a new game)
+    def clear(self):
+        self.flags[:] = array("B", [EMPTY]) * self.size
+        self.generation = 0
+
+    # Returns (value, depth, flag, best column) stored for a position key, or None
+    def probe(self, key):
+        index = key % self.size
+        if self.flags[index] == EMPTY or self.keys[index] != key:
+            return None
+        return self.values[index], self.depths[index], self.flags[index], self.moves[index]
+
+    # Returns the best column stored for a position key, or None
+    def best_move(self, key):
+        index = key % self.size
+        if self.flags[index] == EMPTY or self.keys[index] != key or self.moves[index] < 0:
+            return None
+        return self.moves[index]
+
+    # Stores the result of a search with depth-preferred replacement
+    def store(self, key, depth, value, flag, best_move):
+        index = key % self.size
+        if (self.flags[index] != EMPTY and self.keys[index] != key and self.depths[index] > depth and
+                self.generations[index] == self.generation):
+            return  # Keep the deeper entry of this search
+        self.keys[index] = key
+        self.values[index] = value
+        self.depths[index] = depth
+        self.flags[index] = flag
+        self.moves[index] = -1 if best_move is None else best_move
+        self.generations[index] = self.generation
@@ -1,12 +1,15 @@
 #  Author: Kyle Tranfaglia
 #  Title: PynacleGames - Game05 - Connect Four
-#  Last updated: 04/03/25
+#  Last updated: 10/18/26
 #  Description: This program runs test to play Connect Four bots against one another to test bot skill
 import random
 import math
 import time
 from datetime import datetime
 import sys
+from itertools import islice
+from multiprocessing import Pool
+from BitboardConnectFour import Position, CENTER_MASK, popcount, row_mask, window_score
 
 # Constants for board size
 ROWS = 6
@@ -19,6 +22,11 @@ DIFFICULTIES = ["Easy", "Medium", "Hard", "Master"]
 ORIGINAL = "Original"
 UPDATED = "Updated"
 
+# Bitboard evaluation: window scores (four, three and an empty cell, two and two empty cells) and the rows whose
+# pieces get a (ROWS - r) // 4 = 1 point bonus (the top three rows, r counted from the top)
+WINDOW_SCORES = (1000, 50, 10)
+ROW_BONUS_MASK = row_mask(ROWS - 3) | row_mask(ROWS - 2) | row_mask(ROWS - 1)
+
 
 class ConnectFourSimulator:
     def __init__(self, log_to_file=True, verbose=False):
@@ -53,21 +61,44 @@ class ConnectFourSimulator:
         """Check if a move is valid (column not full)"""
         return 0 <= col < COLS and board[0][col] == 0
 
-    def get_next_open_row(self, board, col):
-        """Find the next open row in the specified column"""
+    def column_heights(self, board):
+        """Count the pieces in every column"""
+        return [sum(1 for row in range(ROWS) if board[row][col] != 0) for col in range(COLS)]
+
+    def get_next_open_row(self, board, col, heights=None):
+        """Find the next open row in the specified column (without a scan when the column heights are given)"""
+        if heights is not None:
+            return ROWS - 1 - heights[col]
         for row in range(ROWS - 1, -1, -1):
             if board[row][col] == 0:
                 return row
         return -1
 
-    def drop_piece(self, board, col, player):
-        """Drop a piece in the specified column for the specified player"""
-        row = self.get_next_open_row(board, col)
+    def drop_piece(self, board, col, player, heights=None):
+        """Drop a piece in the specified column for the specified player (and count it in the column heights)"""
+        row = self.get_next_open_row(board, col, heights)
         if row >= 0:
             board[row][col] = player
+            if heights is not None:
+                heights[col] += 1
             return row
         return -1
 
+    def undo_piece(self, board, col, heights):
+        """Remove the top piece of the specified column (undoes drop_piece)"""
+        heights[col] -= 1
+        board[ROWS - 1 - heights[col]][col] = 0
+
+    def find_winning_move(self, board, heights, valid_columns, player):
+        """Find the first column where the specified player would connect four (-1 if there is none)"""
+        for col in valid_columns:
+            row = self.drop_piece(board, col, player, heights)
+            win = self.check_win(board, row, col)
+            self.undo_piece(board, col, heights)
+            if win:
+                return col
+        return -1
+
     def check_win(self, board, row, col):
         """Check if the most recent move resulted in a win"""
         player = board[row][col]
@@ -95,34 +126,6 @@ class ConnectFourSimulator:
         """Check if the board is full (draw)"""
         return all(board[0][col] != 0 for col in range(COLS))
 
-    def check_win_for_player(self, board, player):
-        """Check if the specified player has won anywhere on the board"""
-        # Check horizontal
-        for row in range(ROWS):
-            for col in range(COLS - 3):
-                if all(board[row][col + i] == player for i in range(4)):
-                    return True
-
-        # Check vertical
-        for col in range(COLS):
-            for row in range(ROWS - 3):
-                if all(board[row + i][col] == player for i in range(4)):
-                    return True
-
-        # Check positive diagonal
-        for row in range(ROWS - 3):
-            for col in range(COLS - 3):
-                if all(board[row + i][col + i] == player for i in range(4)):
-                    return True
-
-        # Check negative diagonal
-        for row in range(3, ROWS):
-            for col in range(COLS - 3):
-                if all(board[row - i][col + i] == player for i in range(4)):
-                    return True
-
-        return False
-
     def print_board(self, board):
         """Print the current board state to console (for debugging)"""
         for row in board:
@@ -146,6 +149,18 @@ class ConnectFourSimulator:
         """
         Simulate games between two bots
         """
+        games = (self.play_game(
+            red_bot_type=bot1_type,
+            red_bot_difficulty=bot1_difficulty,
+            yellow_bot_type=bot2_type,
+            yellow_bot_difficulty=bot2_difficulty
+        ) for _ in range(num_games))
+        return self.record_games(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, games, num_games)
+
+    def record_games(self, bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, games, num_games):
+        """
+        Log the results of games between two bots (bot1 as red) as they finish and summarize them
+        """
         # Statistics tracking
         bot1_wins = 0
         bot2_wins = 0
@@ -165,15 +180,8 @@ class ConnectFourSimulator:
         separator = "=" * len(header)
         self.log(f"\n{separator}\n{header}\n{separator}\n")
 
-        # Play games
-        for game_num in range(1, num_games + 1):
-            result = self.play_game(
-                red_bot_type=bot1_type,
-                red_bot_difficulty=bot1_difficulty,
-                yellow_bot_type=bot2_type,
-                yellow_bot_difficulty=bot2_difficulty
-            )
-
+        # Tally games
+        for game_num, result in enumerate(games, start=1):
             if result["winner"] == 1:
                 bot1_wins += 1
                 result_str = f"Red ({bot1_type} {bot1_difficulty}) won"
@@ -224,6 +232,7 @@ class ConnectFourSimulator:
         current_player = 1  # 1 = Red, 2 = Yellow
         moves = 0
         winner = 0
+        heights = [0] * COLS  # Pieces in every column
         
         move_history = []
 
@@ -256,7 +265,7 @@ class ConnectFourSimulator:
             move_history.append(col)
 
             # Make the move
-            row = self.drop_piece(board, col, current_player)
+            row = self.drop_piece(board, col, current_player, heights)
             if row == -1:
                 # This should not happen if is_valid_move check passed
                 self.log(f"ERROR: Failed to drop piece at column {col}")
@@ -329,21 +338,17 @@ class ConnectFourSimulator:
         valid_columns = [col for col in range(COLS) if self.is_valid_move(board, col)]
         if not valid_columns:
             return -1
+        heights = self.column_heights(board)
 
         # Play winning move if possible
-        for col in valid_columns:
-            temp_board = [row[:] for row in board]  # Create a deep copy of the board
-            row = self.drop_piece(temp_board, col, player)
-            if row != -1 and self.check_win(temp_board, row, col):
-                return col
+        col = self.find_winning_move(board, heights, valid_columns, player)
+        if col != -1:
+            return col
 
         # Block opponent from winning
-        opponent = 3 - player
-        for col in valid_columns:
-            temp_board = [row[:] for row in board]  # Create a deep copy of the board
-            row = self.drop_piece(temp_board, col, opponent)
-            if row != -1 and self.check_win(temp_board, row, col):
-                return col
+        col = self.find_winning_move(board, heights, valid_columns, 3 - player)
+        if col != -1:
+            return col
 
         # Play randomly as a last resort
         return random.choice(valid_columns)
@@ -372,21 +377,17 @@ class ConnectFourSimulator:
         valid_columns = [col for col in range(COLS) if self.is_valid_move(board, col)]
         if not valid_columns:
             return -1
+        heights = self.column_heights(board)
 
         # Play winning move if possible
-        for col in valid_columns:
-            temp_board = [row[:] for row in board]
-            row = self.drop_piece(temp_board, col, player)
-            if row != -1 and self.check_win(temp_board, row, col):
-                return col
+        col = self.find_winning_move(board, heights, valid_columns, player)
+        if col != -1:
+            return col
 
         # Block opponent from winning
-        opponent = 3 - player
-        for col in valid_columns:
-            temp_board = [row[:] for row in board]
-            row = self.drop_piece(temp_board, col, opponent)
-            if row != -1 and self.check_win(temp_board, row, col):
-                return col
+        col = self.find_winning_move(board, heights, valid_columns, 3 - player)
+        if col != -1:
+            return col
 
         if updated and master:
             # Then adjust based on game phase
@@ -424,15 +425,13 @@ class ConnectFourSimulator:
         best_col = ordered_columns[0]  # Default to first column
         best_score = -math.inf
         best_columns = []  # For ties
+        position = Position.from_board(board, player)
 
         for col in ordered_columns:
-            temp_board = [row[:] for row in board]
-            row = self.drop_piece(temp_board, col, player)
-            if row == -1:
-                continue
-                
             # Player is maximizing
-            score = self.minimax(temp_board, depth - 1, -math.inf, math.inf, False, player)
+            move = position.play(col)
+            score = self.minimax(position, depth - 1, -math.inf, math.inf, False, player)
+            position.undo(move)
 
             # Keep track of best score and ties
             if score > best_score:
@@ -448,31 +447,26 @@ class ConnectFourSimulator:
 
         return best_col
 
-    def minimax(self, board, depth, alpha, beta, maximizing, player):
-        """Minimax algorithm with alpha-beta pruning"""
+    def minimax(self, position, depth, alpha, beta, maximizing, player):
+        """Minimax algorithm with alpha-beta pruning on a bitboard position, played and unplayed in place"""
         opponent = 3 - player
-        
+
         # Terminal state checks
-        if self.check_win_for_player(board, player):
+        if position.wins(player):
             return 10000  # Player wins
-        if self.check_win_for_player(board, opponent):
+        if position.wins(opponent):
             return -10000  # Opponent wins
-        if self.check_draw(board):
+        if position.is_full():
             return 0  # Draw
         if depth == 0:
-            return self.evaluate_board(board, player)
+            return self.evaluate_position(position, player)
 
-        valid_columns = [col for col in range(COLS) if self.is_valid_move(board, col)]
-        
         if maximizing:  # Player's turn
             value = -math.inf
-            for col in valid_columns:
-                temp_board = [row[:] for row in board]
-                row = self.drop_piece(temp_board, col, player)
-                if row == -1:
-                    continue
-                    
-                new_score = self.minimax(temp_board, depth - 1, alpha, beta, False, player)
+            for col in position.valid_columns():
+                move = position.play(col)
+                new_score = self.minimax(position, depth - 1, alpha, beta, False, player)
+                position.undo(move)
                 value = max(value, new_score)
                 alpha = max(alpha, value)
                 if alpha >= beta:
@@ -480,84 +474,24 @@ class ConnectFourSimulator:
             return value
         else:  # Opponent's turn
             value = math.inf
-            for col in valid_columns:
-                temp_board = [row[:] for row in board]
-                row = self.drop_piece(temp_board, col, opponent)
-                if row == -1:
-                    continue
-                    
-                new_score = self.minimax(temp_board, depth - 1, alpha, beta, True, player)
+            for col in position.valid_columns():
+                move = position.play(col)
+                new_score = self.minimax(position, depth - 1, alpha, beta, True, player)
+                position.undo(move)
                 value = min(value, new_score)
                 beta = min(beta, value)
                 if alpha >= beta:
                     break
             return value
 
-    def evaluate_board(self, board, player):
-        """Evaluate the board from the perspective of the specified player"""
-        score = 0
-        opponent = 3 - player
-
-        # Center column preference
-        center_col = COLS // 2
-        center_count = sum(1 for row in range(ROWS) if board[row][center_col] == player)
-        score += center_count * 6
-
-        # Count pieces and give bonus for pieces in lower rows
-        for r in range(ROWS):
-            row_bonus = ROWS - r  # Higher bonus for lower rows
-            for c in range(COLS):
-                if board[r][c] == player:
-                    score += row_bonus // 4  # Small bonus for lower pieces
-
-        # Evaluate all possible windows of 4
-        for r in range(ROWS):
-            for c in range(COLS - 3):  # Horizontal windows
-                window = [board[r][c+i] for i in range(4)]
-                score += self.evaluate_window(window, player, opponent)
-                
-        for r in range(ROWS - 3):
-            for c in range(COLS):  # Vertical windows
-                window = [board[r+i][c] for i in range(4)]
-                score += self.evaluate_window(window, player, opponent)
-                
-        for r in range(ROWS - 3):
-            for c in range(COLS - 3):  # Positive diagonal windows
-                window = [board[r+i][c+i] for i in range(4)]
-                score += self.evaluate_window(window, player, opponent)
-                
-        for r in range(3, ROWS):
-            for c in range(COLS - 3):  # Negative diagonal windows
-                window = [board[r-i][c+i] for i in range(4)]
-                score += self.evaluate_window(window, player, opponent)
-
+    def evaluate_position(self, position, player):
+        """Evaluate a bitboard position from the perspective of the specified player"""
+        player_pieces = position.pieces(player)
+        score = popcount(player_pieces & CENTER_MASK) * 6
+        score += popcount(player_pieces & ROW_BONUS_MASK)
+        score += window_score(player_pieces, position.pieces(3 - player), WINDOW_SCORES)
         return score
 
-    def evaluate_window(self, window, player, opponent):
-        """Evaluate a window of 4 positions"""
-        player_count = window.count(player)
-        opponent_count = window.count(opponent)
-        empty_count = window.count(0)
-
-        # Score based on game theory of Connect Four
-        if player_count == 4:
-            return 1000  # Win
-        elif player_count == 3 and empty_count == 1:
-            return 50   # Threat
-        elif player_count == 2 and empty_count == 2:
-            return 10   # Potential
-
-        # Defensive scoring
-        if opponent_count == 4:
-            return -1000  # Loss
-        elif opponent_count == 3 and empty_count == 1:
-            return -50    # Opponent threat
-        elif opponent_count == 2 and empty_count == 2:
-            return -10    # Opponent potential
-
-        # Add a small preference for lower positions
-        return 0
-
     # Updated AI implementations
 
     def updated_ai_easy(self, board, player):
@@ -585,6 +519,71 @@ def test_bots(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, num_games=
     
     start_time = time.time()
     
+    # First configuration: Bot1 as red, Bot2 as yellow
+    result1 = simulator.simulate_games(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, num_games)
+    
+    # Second configuration: Bot2 as red, Bot1 as yellow (if swap_players is True)
+    result2 = None
+    if swap_players:
+        result2 = simulator.simulate_games(bot2_type, bot2_difficulty, bot1_type, bot1_difficulty, num_games)
+    
+    return log_overall_results(simulator, bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, result1, result2,
+                               num_games, start_time)
+
+
+def play_seeded_game(game):
+    """
+    Play one tournament game in a worker process: (red type, red difficulty, yellow type, yellow difficulty, seed)
+    """
+    red_bot_type, red_bot_difficulty, yellow_bot_type, yellow_bot_difficulty, seed = game
+    random.seed(seed)  # The bots draw their random moves from the global generator
+    simulator = ConnectFourSimulator(log_to_file=False)
+    return simulator.play_game(red_bot_type, red_bot_difficulty, yellow_bot_type, yellow_bot_difficulty)
+
+
+def run_tournament(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, num_games=50, swap_players=True,
+                   processes=None, seed=None, log_to_file=True, verbose=True):
+    """
+    Test two bots against each other like test_bots, playing the games in parallel on a pool of processes (one per CPU
+    by default). Every game gets its own seed drawn from the tournament seed, so a tournament can be replayed exactly
+    with any number of processes
+    """
+    simulator = ConnectFourSimulator(log_to_file=log_to_file, verbose=verbose)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    simulator.log(f"Tournament seed: {seed}")
+    seeds = random.Random(seed)
+
+    start_time = time.time()
+
+    # Bot1 plays red in the first num_games games and yellow in the rest (if swap_players is True)
+    games = [(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, seeds.randrange(2 ** 32))
+             for _ in range(num_games)]
+    if swap_players:
+        games += [(bot2_type, bot2_difficulty, bot1_type, bot1_difficulty, seeds.randrange(2 ** 32))
+                  for _ in range(num_games)]
+
+    with Pool(processes) as pool:
+        # Every game runs as soon as a process is free, and results arrive in the order the games were listed
+        results = pool.imap(play_seeded_game, games)
+        result1 = simulator.record_games(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty,
+                                         islice(results, num_games), num_games)
+        result2 = None
+        if swap_players:
+            result2 = simulator.record_games(bot2_type, bot2_difficulty, bot1_type, bot1_difficulty,
+                                             islice(results, num_games), num_games)
+
+    return log_overall_results(simulator, bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, result1, result2,
+                               num_games, start_time)
+
+
+def log_overall_results(simulator, bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, result1, result2, num_games,
+                        start_time):
+    """
+    Combine the results of bot1 as red (result1) and as yellow (result2, None if colors were not swapped) and log them
+    """
+    swap_players = result2 is not None
+
     # Store results
     results = {
         "bot1_wins_as_red": 0,
@@ -596,8 +595,6 @@ def test_bots(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, num_games=
     }
     
     # First configuration: Bot1 as red, Bot2 as yellow
-    result1 = simulator.simulate_games(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, num_games)
-    
     results["bot1_wins_as_red"] = result1["bot1_wins"]
     results["bot2_wins_as_yellow"] = result1["bot2_wins"]
     results["draws"] += result1["draws"]
@@ -605,8 +602,6 @@ def test_bots(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, num_games=
     
     # Second configuration: Bot2 as red, Bot1 as yellow (if swap_players is True)
     if swap_players:
-        result2 = simulator.simulate_games(bot2_type, bot2_difficulty, bot1_type, bot1_difficulty, num_games)
-        
         results["bot2_wins_as_red"] = result2["bot1_wins"]
         results["bot1_wins_as_yellow"] = result2["bot2_wins"]
         results["draws"] += result2["draws"]
@@ -649,37 +644,37 @@ def test_bots(bot1_type, bot1_difficulty, bot2_type, bot2_difficulty, num_games=
 
 def main():
     # Test same difficulty levels (hard)
-    test_bots(
+    run_tournament(
         bot1_type=ORIGINAL,
         bot1_difficulty="Hard",
         bot2_type=ORIGINAL, 
         bot2_difficulty="Hard", 
-        num_games=3,
+        num_games=50,
         swap_players=True
     )
     
     # Test Original Hard vs Updated Hard
-    test_bots(
+    run_tournament(
         bot1_type=ORIGINAL,
         bot1_difficulty="Hard",
         bot2_type=UPDATED, 
         bot2_difficulty="Hard", 
-        num_games=3,
+        num_games=100,
         swap_players=True
     )
     
     # Test master difficulty
-    test_bots(
+    run_tournament(
         bot1_type=ORIGINAL,
         bot1_difficulty="Master",
         bot2_type=UPDATED, 
         bot2_difficulty="Master", 
-        num_games=3,
+        num_games=200,
         swap_players=True
     )
 
     # Test same difficulty levels (easy)
-    test_bots(
+    run_tournament(
         bot1_type=ORIGINAL,
         bot1_difficulty="Easy",
         bot2_type=ORIGINAL, 
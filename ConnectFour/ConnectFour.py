@@ -1,13 +1,16 @@
 #  Author: Kyle Tranfaglia
 #  Title: PynacleGames - Game05 - Connect Four
-#  Last updated: 04/07/25
+#  Last updated: 10/18/26
 #  Description: This program uses PyQt5 packages to build the game Connect Four with many AI bots of various strength
 import sys
 import random
 import math
+import time
 from PyQt5.QtWidgets import QApplication, QWidget, QLabel, QPushButton, QDialog, QVBoxLayout
 from PyQt5.QtGui import QPainter, QBrush, QColor
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from BitboardConnectFour import (Position, TranspositionTable, CENTER_MASK, EXACT, LOWER, UPPER, has_four, popcount,
+                                 row_mask, window_score)
 
 # Constants for board size and appearance
 ROWS = 6
@@ -17,6 +20,20 @@ W_HEIGHT = 768
 SPACING = 12
 TILE_SIZE = 96
 
+# Minimax evaluation: window scores (four, three and an empty cell, two and two empty cells) and the bottom two rows
+WINDOW_SCORES = (1000000, 100, 10)
+FOUNDATION_MASK = row_mask(0) | row_mask(1)
+WIN_SCORE = 100000  # Minimax score of a won game (a search that finds one has found a forced win or loss)
+
+# Seconds the hard and master bots may spend deepening their search for one move
+SEARCH_TIME_LIMITS = {"Hard": 0.25, "Master": 1.0}
+TIME_CHECK_INTERVAL = 1024  # Nodes searched between clock checks
+
+
+# Raised inside minimax when the time limit of a move runs out, abandoning the unfinished iteration
+class SearchTimeout(Exception):
+    pass
+
 
 # Dialogue box to display AI difficulties
 class DifficultyDialog(QDialog):
@@ -103,6 +120,9 @@ class ConnectFour(QWidget):
         self.selected_col = -1  # Track the column the mouse is hovering over
         self.win_flag = 0  # 0 = No win, 1 = Red wins, 2 = Yellow wins
         self.difficulty = "Medium"
+        self.transposition_table = TranspositionTable()  # Minimax results, kept for every move of a game
+        self.search_nodes = 0  # Nodes searched for the current move
+        self.search_deadline = math.inf  # Time the current move's search must finish by
 
         # Pre-calculate offsets
         self.offset_x = (W_WIDTH - (TILE_SIZE * COLS)) // 2
@@ -444,45 +464,19 @@ class ConnectFour(QWidget):
 
     # Check if playing in this column creates a potential win in the next move
     def simulate_win_in_two(self, col, player):
-        # Get the row where the piece would land
-        for row in reversed(range(ROWS)):
-            if self.board[row][col] == 0:
-                # Place the piece
-                self.board[row][col] = player
-
-                # Check if this creates any immediate threats (position where placing a piece would create a win)
-                threat_count = 0
-
-                # Check all valid columns for potential win on next move
-                for next_col in range(COLS):
-                    if self.board[0][next_col] != 0:  # Column is full
-                        continue
-
-                    # Find row where next piece would go
-                    next_row = -1
-                    for r in reversed(range(ROWS)):
-                        if self.board[r][next_col] == 0:
-                            next_row = r
-                            break
-
-                    if next_row >= 0:
-                        # Place the piece to check for win
-                        self.board[next_row][next_col] = player
+        position = Position.from_board(self.board, player)
+        if not position.can_play(col):
+            return False
 
-                        # Check if this is a win
-                        if self.check_win_for_player(player):
-                            threat_count += 1
+        # Place the piece
+        position.play(col)
+        pieces = position.pieces(player)
 
-                        # Remove the test piece
-                        self.board[next_row][next_col] = 0
+        # Count the columns where the next piece of the player would win (immediate threats)
+        threat_count = sum(1 for next_col in position.valid_columns() if has_four(pieces | position.move_bit(next_col)))
 
-                # Remove the original piece
-                self.board[row][col] = 0
-
-                # If we found 2 or more threats, this is a winning move
-                return threat_count >= 2
-
-        return False
+        # If we found 2 or more threats, this is a winning move
+        return threat_count >= 2
 
     # Main minimax function to find great moves for hard and master bot
     def ai_minimax(self):
@@ -532,17 +526,6 @@ class ConnectFour(QWidget):
                 self.drop_piece(col)
                 return
 
-        # Adjust search depth based on difficulty and game phase
-        base_depth = 4 if self.difficulty == "Hard" else 6  # Base depth based on difficulty
-
-        # Then adjust based on game phase
-        if move_count <= 8:  # Early game
-            current_depth = min(base_depth, 4)  # Cap at 4 for early game
-        elif move_count <= 20:  # Mid-game
-            current_depth = min(base_depth, 5)  # Cap at 5 for mid-game
-        else:  # Late game
-            current_depth = base_depth  # Use full depth for late game
-
         # Order columns differently based on game phase
         if move_count <= 8:
             # Early game: heavily favor center and adjacent columns
@@ -562,106 +545,132 @@ class ConnectFour(QWidget):
                                          abs(x - center_col)  # Others by distance
                                      ))
 
-        # Minimax search
+        # Minimax search, deepened until the time limit of the difficulty runs out
+        position = Position.from_board(self.board, 2)
+        best_col = self.iterative_deepening(position, ordered_columns, SEARCH_TIME_LIMITS[self.difficulty])
+
+        self.selected_col = best_col
+        self.update()
+        self.drop_piece(best_col)
+
+    # Search one ply deeper at a time until the time limit runs out, returning the best column of the deepest completed
+    # search. Each search starts with the previous best column, and the transposition table keeps the results of
+    # earlier searches to order the moves of the next one
+    def iterative_deepening(self, position, ordered_columns, time_limit):
+        self.transposition_table.new_search()
+        start_time = time.perf_counter()
+        self.search_nodes = 0
+        self.search_deadline = math.inf  # Always complete the first search so there is a move to play
+        best_col = ordered_columns[0]
+
+        for depth in range(ROWS * COLS - position.moves):
+            try:
+                best_col, best_score = self.search_root(position, ordered_columns, depth)
+            except SearchTimeout:
+                break  # Keep the best column of the last completed search (the position is discarded unfinished)
+
+            # Stop early once a forced win or loss is found
+            if abs(best_score) >= WIN_SCORE:
+                break
+
+            ordered_columns = [best_col] + [col for col in ordered_columns if col != best_col]
+            self.search_deadline = start_time + time_limit
+
+        return best_col
+
+    # Score every column to the given depth and return the best column and its score
+    def search_root(self, position, ordered_columns, depth):
         best_col = ordered_columns[0]  # Default to first column in prioritized list
         best_score = -math.inf
-        memo = {}
 
         for col in ordered_columns:
-            row = self.get_next_open_row(col)
-            self.board[row][col] = 2  # AI's piece
+            move = position.play(col)  # AI's piece
 
-            score = self.minimax_with_memo(current_depth, -math.inf, math.inf, False, memo)
+            # Only a score above the best so far matters, so search with the best score as alpha
+            score = self.minimax_with_memo(position, depth, best_score, math.inf, False)
 
-            self.board[row][col] = 0
+            position.undo(move)
 
             if score > best_score:
                 best_score = score
                 best_col = col
 
-        self.selected_col = best_col
-        self.update()
-        self.drop_piece(best_col)
+        return best_col, best_score
+
+    # Minimax algorithm with a transposition table to prevent redundant calculations (searches a bitboard position in
+    # place). Entries store whether the value is exact or a bound from an alpha-beta cutoff, and the best column
+    def minimax_with_memo(self, position, depth, alpha, beta, maximizing):
+        # Check the clock every so many nodes
+        self.search_nodes += 1
+        if self.search_nodes % TIME_CHECK_INTERVAL == 0 and time.perf_counter() > self.search_deadline:
+            raise SearchTimeout
 
-    # Minimax algorithm with memoization to prevent redundant calculations
-    def minimax_with_memo(self, depth, alpha, beta, maximizing, memo):
         # Terminal state checks
-        if self.check_win_for_player(2):
-            return 100000
-        if self.check_win_for_player(1):
-            return -100000
-        if all(self.board[0][col] != 0 for col in range(COLS)):
+        if position.wins(2):
+            return WIN_SCORE
+        if position.wins(1):
+            return -WIN_SCORE
+        if position.is_full():
             return 0
 
         if depth == 0:
-            return self.evaluate_board()
-
-        # Only create hash for memoization if needed
-        memo_key = None
-        if depth <= 2:
-            # Lighter board hashing using Zobrist-inspired approach
-            board_hash = 0
-            for r in range(ROWS):
-                for c in range(COLS):
-                    if self.board[r][c] != 0:
-                        # Use a simpler hashing scheme: position * 3 + piece
-                        index = r * COLS + c
-                        piece_val = self.board[r][c]
-                        board_hash ^= (index * 3 + piece_val) * 73  # Prime multiplier helps distribution
-
-            memo_key = (board_hash, depth, maximizing)
-
-            # Return cached result if available
-            if memo_key in memo:
-                return memo[memo_key]
-
-        valid_columns = [col for col in range(COLS) if self.board[0][col] == 0]
-
-        # Order columns by distance from center for better pruning
+            return self.evaluate_board(position)
+
+        # Use a stored result that was searched at least as deep, or narrow the window with a stored bound
+        key = position.key()
+        entry = self.transposition_table.probe(key)
+        best_move = None
+        if entry is not None:
+            stored_value, stored_depth, flag, best_move = entry
+            if stored_depth >= depth:
+                if flag == EXACT:
+                    return stored_value
+                if flag == LOWER and stored_value >= beta:
+                    return stored_value
+                if flag == UPPER and stored_value <= alpha:
+                    return stored_value
+        original_alpha, original_beta = alpha, beta
+
+        # Order columns by distance from center for better pruning, trying the stored best column first
         center_col = COLS // 2
-        valid_columns.sort(key=lambda x: abs(x - center_col))
+        valid_columns = sorted(position.valid_columns(), key=lambda x: (x != best_move, abs(x - center_col)))
 
         if maximizing:  # AI's turn
             value = -math.inf
             for col in valid_columns:
-                row = self.get_next_open_row(col)
-                if row == -1:  # Skip full columns
-                    continue
-
-                self.board[row][col] = 2
-                new_score = self.minimax_with_memo(depth - 1, alpha, beta, False, memo)
-                self.board[row][col] = 0
-                value = max(value, new_score)
+                move = position.play(col)
+                new_score = self.minimax_with_memo(position, depth - 1, alpha, beta, False)
+                position.undo(move)
+                if new_score > value:
+                    value = new_score
+                    best_move = col
                 alpha = max(alpha, value)
                 if alpha >= beta:
                     break
 
-            # Store result for shallow depths
-            if depth <= 2 and memo_key is not None:
-                memo[memo_key] = value
-
-            return value
-
         else:  # Human's turn
             value = math.inf
             for col in valid_columns:
-                row = self.get_next_open_row(col)
-                if row == -1:  # Skip full columns
-                    continue
-
-                self.board[row][col] = 1
-                new_score = self.minimax_with_memo(depth - 1, alpha, beta, True, memo)
-                self.board[row][col] = 0
-                value = min(value, new_score)
+                move = position.play(col)
+                new_score = self.minimax_with_memo(position, depth - 1, alpha, beta, True)
+                position.undo(move)
+                if new_score < value:
+                    value = new_score
+                    best_move = col
                 beta = min(beta, value)
                 if alpha >= beta:
                     break
 
-            # Store result for shallow depths
-            if depth <= 2 and memo_key is not None:
-                memo[memo_key] = value
+        # A value outside the search window is only a bound on the true value
+        if value <= original_alpha:
+            flag = UPPER
+        elif value >= original_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, depth, value, flag, best_move)
 
-            return value
+        return value
 
     # Check if the current board state is terminal (win or draw)
     def check_for_terminal(self):
@@ -682,73 +691,15 @@ class ConnectFour(QWidget):
                 return row
         return -1  # Shouldn't happen
 
-    # Evaluate a board state
-    def evaluate_board(self):
-        score = 0
-
-        # Center column preference
-        center_col = COLS // 2
-        center_array = [self.board[row][center_col] for row in range(ROWS)]
-        center_ai_count = center_array.count(2)
-        score += center_ai_count * 6  # Higher weight for center control
-
-        # Evaluate all possible windows of 4
-
-        # Horizontal windows
-        for row in range(ROWS):
-            for col in range(COLS - 3):
-                window = [self.board[row][col + i] for i in range(4)]
-                score += self.score_window(window)
-
-        # Vertical windows
-        for col in range(COLS):
-            for row in range(ROWS - 3):
-                window = [self.board[row + i][col] for i in range(4)]
-                score += self.score_window(window)
-
-        # Positive diagonal windows
-        for row in range(ROWS - 3):
-            for col in range(COLS - 3):
-                window = [self.board[row + i][col + i] for i in range(4)]
-                score += self.score_window(window)
-
-        # Negative diagonal windows
-        for row in range(3, ROWS):
-            for col in range(COLS - 3):
-                window = [self.board[row - i][col + i] for i in range(4)]
-                score += self.score_window(window)
-
-        # Bonus for controlling lower rows (foundation pieces)
-        for col in range(COLS):
-            for row in range(ROWS - 2, ROWS):  # Bottom two rows
-                if self.board[row][col] == 2:
-                    score += 2  # Small bonus for lower positions
-
+    # Evaluate a bitboard position for the AI: center control, every window of 4 (favoring AI piece clustering and
+    # straying from human piece clustering) and foundation pieces in the bottom two rows
+    def evaluate_board(self, position):
+        ai_pieces = position.pieces(2)
+        score = popcount(ai_pieces & CENTER_MASK) * 6  # Higher weight for center control
+        score += window_score(ai_pieces, position.pieces(1), WINDOW_SCORES)
+        score += popcount(ai_pieces & FOUNDATION_MASK) * 2  # Small bonus for lower positions
         return score
 
-    # Get a score for a window (game board subset) to favor AI piece clustering and stray from human piece clustering
-    def score_window(self, window):
-        ai_count = window.count(2)
-        human_count = window.count(1)
-        empty_count = window.count(0)
-
-        # Base scoring
-        if ai_count == 4:
-            return 1000000  # Certain win
-        elif ai_count == 3 and empty_count == 1:
-            return 100  # Strong threat
-        elif ai_count == 2 and empty_count == 2:
-            return 10  # Developing position
-
-        if human_count == 4:
-            return -1000000  # Certain loss
-        elif human_count == 3 and empty_count == 1:
-            return -100  # Urgent threat
-        elif human_count == 2 and empty_count == 2:
-            return -10  # Potential threat
-
-        return 0
-
     # Helper function to simulate a move and check if it leads to a win
     def simulate_move(self, col, player):
         for row in reversed(range(ROWS)):
@@ -765,6 +716,7 @@ class ConnectFour(QWidget):
         self.current_player = 1
         self.selected_col = -1
         self.win_flag = 0
+        self.transposition_table.clear()
         self.result_label.setText("")
         self.update()
 
@@ -1,6 +1,6 @@
 #  Author: Kyle Tranfaglia
 #  Title: PynacleGames - Game05 - Connect Four
-#  Last updated: 03/20/25
+#  Last updated: 10/18/26
 #  Description: This program uses PyQt5 packages to build the game Connect Four with many AI bots of various strength
 import sys
 import random
@@ -8,6 +8,7 @@ import math
 from PyQt5.QtWidgets import QApplication, QWidget, QLabel, QPushButton, QDialog, QVBoxLayout
 from PyQt5.QtGui import QPainter, QBrush, QColor
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from BitboardConnectFour import Position, CENTER_MASK, HORIZONTAL, VERTICAL, popcount, window_score
 
 # Constants for board size and appearance
 ROWS = 6
@@ -17,6 +18,10 @@ W_HEIGHT = 800
 SPACING = 12
 TILE_SIZE = 96
 
+# Minimax evaluation: window scores (four, three and an empty cell, two and two empty cells) and scored directions
+WINDOW_SCORES = (100000, 50, 10)
+WINDOW_DIRECTIONS = (HORIZONTAL, VERTICAL)
+
 
 # Dialogue box to display AI difficulties
 class DifficultyDialog(QDialog):
@@ -467,13 +472,13 @@ class ConnectFour(QWidget):
                                      x - COLS // 2))
 
         # Access move quality starting with highly prioritized columns
+        position = Position.from_board(self.board, 2)
         for col in ordered_columns:
-            row = self.get_next_open_row(col)
-            self.board[row][col] = 2  # AI's piece
+            move = position.play(col)  # AI's piece
 
-            score = self.minimax_with_memo(depth, -math.inf, math.inf, False, {})
+            score = self.minimax_with_memo(position, depth, -math.inf, math.inf, False, {})
 
-            self.board[row][col] = 0
+            position.undo(move)
 
             if score > best_score:
                 best_score = score
@@ -483,28 +488,27 @@ class ConnectFour(QWidget):
         self.update()  # Redraw to reflect the change
         self.drop_piece(best_col)
 
-    #  Minimax with memoization to avoid recalculating positions
-    def minimax_with_memo(self, depth, alpha, beta, maximizing, memo):
-        # Create a string representation of the board as a key
-        board_key = hash(tuple(map(tuple, self.board)))
-        memo_key = (board_key, depth, maximizing)
+    #  Minimax with memoization to avoid recalculating positions (searches a bitboard position in place)
+    def minimax_with_memo(self, position, depth, alpha, beta, maximizing, memo):
+        # The position key identifies the pieces and the player to move
+        memo_key = (position.key(), depth)
 
         # If we've seen this position before, return cached result
         if memo_key in memo:
             return memo[memo_key]
 
         # Check for terminal states (wins or draws)
-        if self.check_win_for_player(2):
+        if position.wins(2):
             return 1000000
-        if self.check_win_for_player(1):
+        if position.wins(1):
             return -1000000
-        if all(self.board[0][col] != 0 for col in range(COLS)):
+        if position.is_full():
             return 0
 
         if depth == 0:
-            return self.evaluate_board()
+            return self.evaluate_board(position)
 
-        valid_columns = [col for col in range(COLS) if self.board[0][col] == 0]
+        valid_columns = position.valid_columns()
 
         # Order columns - prioritize center and columns that have pieces beneath them
         def sort_key(col):
@@ -512,11 +516,7 @@ class ConnectFour(QWidget):
             center_value = -abs(col - COLS // 2)
 
             # Prefer columns with pieces beneath (more likely to create threats)
-            height_value = 0
-            for row in range(ROWS - 1, -1, -1):
-                if self.board[row][col] != 0:
-                    height_value = 5 - abs(row - 2)  # Middle rows preferred
-                    break
+            height_value = 2 if position.height(col) else 0  # The bottom row is found first, so 5 - abs(5 - 2)
 
             return center_value + height_value
 
@@ -526,34 +526,28 @@ class ConnectFour(QWidget):
         if maximizing:  # AI's turn
             value = -math.inf
             for col in valid_columns:
-                row = self.get_next_open_row(col)
-                self.board[row][col] = 2
-                new_score = self.minimax_with_memo(depth - 1, alpha, beta, False, memo)
-                self.board[row][col] = 0
+                move = position.play(col)
+                new_score = self.minimax_with_memo(position, depth - 1, alpha, beta, False, memo)
+                position.undo(move)
                 value = max(value, new_score)
                 alpha = max(alpha, value)
                 if alpha >= beta:
                     break
 
-            # Save result in memo table
-            memo[memo_key] = value
-            return value
-
         else:  # Human's turn
             value = math.inf
             for col in valid_columns:
-                row = self.get_next_open_row(col)
-                self.board[row][col] = 1
-                new_score = self.minimax_with_memo(depth - 1, alpha, beta, True, memo)
-                self.board[row][col] = 0
+                move = position.play(col)
+                new_score = self.minimax_with_memo(position, depth - 1, alpha, beta, True, memo)
+                position.undo(move)
                 value = min(value, new_score)
                 beta = min(beta, value)
                 if alpha >= beta:
                     break
 
-            # Save result in memo table
-            memo[memo_key] = value
-            return value
+        # Save result in memo table
+        memo[memo_key] = value
+        return value
 
     # Check if the current board state is terminal (win or draw)
     def check_for_terminal(self):
@@ -602,51 +596,14 @@ class ConnectFour(QWidget):
                 return row
         return -1  # Shouldn't happen
 
-    # Evaluate a board state
-    def evaluate_board(self):
-        score = 0
-        # Center priority
-        center_col = COLS // 2
-        center_count = sum(1 for row in range(ROWS) if self.board[row][center_col] == 2)
-        score += center_count * 6
-
-        # Weighted scoring for threats
-        for row in range(ROWS):
-            for col in range(COLS - 3):
-                window = [self.board[row][col + i] for i in range(4)]
-                score += self.score_window(window)
-
-        for col in range(COLS):
-            for row in range(ROWS - 3):
-                window = [self.board[row + i][col] for i in range(4)]
-                score += self.score_window(window)
-
+    # Evaluate a bitboard position for the AI: center priority and the horizontal and vertical windows of 4 (favoring AI
+    # piece clustering and straying from human piece clustering)
+    def evaluate_board(self, position):
+        ai_pieces = position.pieces(2)
+        score = popcount(ai_pieces & CENTER_MASK) * 6
+        score += window_score(ai_pieces, position.pieces(1), WINDOW_SCORES, WINDOW_DIRECTIONS)
         return score
 
-    # Get a score for a window (game board subset) to favor AI piece clustering and stray from human piece clustering
-    def score_window(self, window):
-        ai_count = window.count(2)
-        human_count = window.count(1)
-        empty_count = window.count(0)
-
-        # Check for AI piece clustering
-        if ai_count == 4:
-            return 100000
-        elif ai_count == 3 and empty_count == 1:
-            return 50  # Increase the score for better aggression
-        elif ai_count == 2 and empty_count == 2:
-            return 10
-
-        # Check for human piece clustering
-        if human_count == 4:
-            return -100000
-        elif human_count == 3 and empty_count == 1:
-            return -50
-        elif human_count == 2 and empty_count == 2:
-            return -10
-
-        return 0
-
     # Helper function to simulate a move and check if it leads to a win
     def simulate_move(self, col, player):
         for row in reversed(range(ROWS)):
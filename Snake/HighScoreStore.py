@@ -0,0 +1,70 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game02 - Snake
+#  Last updated: 10/18/26
+#  Description: This program stores Snake high scores in an indexed SQLite database
+""" Showing the top ten scores used to mean reading, parsing and sorting every line of scores.txt. Scores now live in a
+SQLite table with an index ordered by score, so saving a score is a single indexed insert and the top scores are read
+straight off the front of the index no matter how many games have been recorded. SQLite locks the file for every write
+(and write-ahead logging lets readers continue meanwhile), so several games can save scores at the same time without
+corrupting the store. The first time the database is opened, any scores already in scores.txt are imported. Every game
+directory runs on its own, so each game keeps its own copy of this module; the copies only differ in the columns they
+store. """
+import os
+import sqlite3
+from contextlib import contextmanager
+
+SCORES_DATABASE = "scores.db"
+LEGACY_SCORES_FILE = "scores.txt"
+
+
+# Persistent high score table for Snake (score and the time the game ended)
+class HighScoreStore:
+    def __init__(self, path=SCORES_DATABASE, legacy_path=LEGACY_SCORES_FILE, timeout=10.0):
+        self.path = path
+        self.timeout = timeout  # Seconds to wait for another writer to release the database
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS scores (id INTEGER PRIMARY KEY, score INTEGER NOT NULL, "
+                               "timestamp TEXT NOT NULL)")
+            # Ties keep the order the scores were saved in
+            connection.execute("CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id)")
+            connection.execute("CREATE TABLE IF NOT EXISTS imported (path TEXT PRIMARY KEY)")
+            self.import_legacy_scores(connection, legacy_path)
+
+    # Opens a connection to the database that commits (or rolls back on an error) and closes when the block ends
+    @contextmanager
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    # Imports the scores of the old text file once
+    def import_legacy_scores(self, connection, legacy_path):
+        if not legacy_path or not os.path.exists(legacy_path):
+            return
+        key = os.path.abspath(legacy_path)
+        connection.execute("BEGIN IMMEDIATE")  # Hold the write lock so two games cannot both import the file
+        if connection.execute("SELECT 1 FROM imported WHERE path = ?", (key,)).fetchone():
+            return
+        rows = []
+        with open(legacy_path, "r") as file:
+            for line in file:
+                parts = line.strip().split(",")
+                if len(parts) == 2 and parts[0].isdigit():
+                    rows.append((int(parts[0]), parts[1]))
+        connection.executemany("INSERT INTO scores (score, timestamp) VALUES (?, ?)", rows)
+        connection.execute("INSERT INTO imported (path) VALUES (?)", (key,))
+
+    # Saves the score of a finished game
+    def add_score(self, score, timestamp):
+        with self.connect() as connection:
+            connection.execute("INSERT INTO scores (score, timestamp) VALUES (?, ?)", (score, timestamp))
+
+    # Returns the highest scores as (score, timestamp) tuples, best first
+    def top_scores(self, limit=10):
+        with self.connect() as connection:
+            return connection.execute("SELECT score, timestamp FROM scores ORDER BY score DESC, id LIMIT ?",
+                                      (limit,)).fetchall()
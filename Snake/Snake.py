@@ -1,15 +1,15 @@
 #  Author: Kyle Tranfaglia
 #  Title: PynacleGames - Game02 - Snake
-#  Last updated: 01/22/25
+#  Last updated: 10/18/26
 #  Description: This program uses PyQt5 packages to build the game Snake with some unique features
 import sys
-import os
 import random
 from datetime import datetime
 from PyQt5.QtCore import Qt, QTimer, QRectF
 from PyQt5.QtGui import QColor, QBrush, QFont
 from PyQt5.QtWidgets import (QApplication, QGraphicsView, QGraphicsScene, QGraphicsRectItem,
                              QLabel, QPushButton, QDialog, QVBoxLayout)
+from HighScoreStore import HighScoreStore
 
 
 # Dialog box object to show high scores
@@ -108,6 +108,7 @@ class SnakeGame(QGraphicsView):
 
         # Score label
         self.score = 0
+        self.score_store = HighScoreStore()  # Indexed high score table (imports scores.txt the first time)
         self.score_label = QLabel(f"Score: {self.score}", self)
         self.score_label.setStyleSheet("font-type: Arial; font-size: 24px; color: white;")
         self.score_label.move(10, 10)
@@ -318,32 +319,19 @@ class SnakeGame(QGraphicsView):
         self.delay = 200
         self.timer.start(self.delay)
 
-    # Save score and date/time in a txt file
+    # Save score and date/time in the high score store
     def save_score(self):
         current_time = datetime.now()
         formatted_time = current_time.strftime("%Y-%m-%d -- %H:%M:%S")
-        with open("scores.txt", "a") as file:
-            file.write(f"{self.score},{formatted_time}\n")
+        self.score_store.add_score(self.score, formatted_time)
 
-    # Load all scores and dates/times for score txt file and return a sorted list (descending)
+    # Load the top ten scores and dates/times from the high score store (descending)
     def load_scores(self):
-        if not os.path.exists("scores.txt"):
-            return []
-        with open("scores.txt", "r") as file:
-            scores = []
-            # Parse the txt file to gather scores and dates/times
-            for line in file:
-                parts = line.strip().split(",")
-                if len(parts) == 2 and parts[0].isdigit():
-                    score = int(parts[0])
-                    timestamp = parts[1]
-                    scores.append((score, timestamp))
-        return sorted(scores, key=lambda x: x[0], reverse=True)  # Return sorted list (descending) by score
+        return self.score_store.top_scores(10)
 
     # Create the high scores dialog box and display the top ten high scores
     def display_high_scores(self):
-        scores = self.load_scores()
-        top_scores = scores[:10]
+        top_scores = self.load_scores()
         dialog = HighScoresDialog(self, top_scores)
         dialog.exec_()
 
@@ -0,0 +1,162 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game04 - 2048
+#  Last updated:  10/18/26
+#  Description: This program simulates thousands of 2048 games at once with NumPy for AI weight evaluation
+""" Stepping one Game2048 at a time spends almost all of its time in the Python interpreter. The batch simulator instead
+holds N boards in a single (N, 4, 4) array of tile exponents and advances every game in lockstep. Moves pack each row
+into a 16-bit index and reuse the Bitboard2048 row tables as NumPy lookup arrays, tile spawns pick a random empty cell
+per board with one cumulative-sum lookup, and boards are evaluated with the weighted row and column tables of
+HeuristicEvaluator, so every afterstate gets exactly the score the scalar solver gives it. The greedy policy scores all
+four afterstates of every board at once, breaks ties in DIRECTIONS order like find_best_move, and games drop out of the
+batch as they end. Tile spawns come from a counter-based generator keyed on a per-game seed and the number of tiles
+spawned so far, so a game's spawn sequence depends only on its seed and never on the other games in the batch, which
+lets different weights be compared on exactly the same games. """
+import numpy as np
+from Bitboard2048 import (LEFT, UP, DOWN, DIRECTIONS, ROW_LEFT_TABLE, ROW_RIGHT_TABLE, ROW_LEFT_SCORE_TABLE,
+                          ROW_RIGHT_SCORE_TABLE)
+from HeuristicTables2048 import HeuristicEvaluator, MAX_TILE_TABLE
+
+# Row-move tables as NumPy lookup arrays
+LEFT_TABLE = np.array(ROW_LEFT_TABLE, dtype=np.uint16)
+RIGHT_TABLE = np.array(ROW_RIGHT_TABLE, dtype=np.uint16)
+LEFT_SCORE_TABLE = np.array(ROW_LEFT_SCORE_TABLE, dtype=np.int64)
+RIGHT_SCORE_TABLE = np.array(ROW_RIGHT_SCORE_TABLE, dtype=np.int64)
+MAX_TILE_ARRAY = np.array(MAX_TILE_TABLE, dtype=np.int64)
+
+ROW_SHIFTS = np.array([0, 4, 8, 12], dtype=np.uint16)  # Bit offset of each column within a packed row
+
+# SplitMix64 constants used to turn (seed, counter) pairs into random numbers
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MIX_MULTIPLIER_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_MULTIPLIER_2 = np.uint64(0x94D049BB133111EB)
+
+
+# Packs an (..., 4) array of exponents into 16-bit rows
+def pack_rows(exponents):
+    exponents = exponents.astype(np.uint16)  # Combining the columns with ORs is much faster than a sum over the last axis
+    return exponents[..., 0] | (exponents[..., 1] << 4) | (exponents[..., 2] << 8) | (exponents[..., 3] << 12)
+
+
+# Unpacks 16-bit rows into an (..., 4) array of exponents
+def unpack_rows(rows):
+    return ((rows[..., np.newaxis] >> ROW_SHIFTS) & 0xF).astype(np.uint8)
+
+
+# Moves every board in the given direction and returns the new boards and the points scored by merges
+def move_boards(boards, direction):
+    # Vertical moves slide the columns, so work on the transposed boards (up is left and down is right)
+    lines = boards.transpose(0, 2, 1) if direction in (UP, DOWN) else boards
+    rows = pack_rows(lines)
+    if direction in (LEFT, UP):
+        new_lines, scores = unpack_rows(LEFT_TABLE[rows]), LEFT_SCORE_TABLE[rows].sum(axis=1)
+    else:
+        new_lines, scores = unpack_rows(RIGHT_TABLE[rows]), RIGHT_SCORE_TABLE[rows].sum(axis=1)
+    new_boards = new_lines.transpose(0, 2, 1) if direction in (UP, DOWN) else new_lines
+    return np.ascontiguousarray(new_boards), scores
+
+
+# Returns a uniform random number in [0, 1) for every (seed, counter) pair using the SplitMix64 finalizer
+def counter_random(seeds, counters):
+    z = seeds + (counters + np.uint64(1)) * GOLDEN_GAMMA  # uint64 arithmetic wraps around
+    z = (z ^ (z >> np.uint64(30))) * MIX_MULTIPLIER_1
+    z = (z ^ (z >> np.uint64(27))) * MIX_MULTIPLIER_2
+    z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+# Returns the weighted row and column tables of the table-based evaluator as NumPy arrays, with the max tile weight
+def evaluation_tables(weights):
+    evaluator = HeuristicEvaluator(weights)
+    return np.array(evaluator.row_table), np.array(evaluator.column_table), evaluator.max_tile_weight
+
+
+# Evaluates every board with four row lookups and four column lookups, adding them in the same order as
+# HeuristicEvaluator.evaluate so both give exactly the same score for a board
+def evaluate_boards(boards, tables):
+    row_table, column_table, max_tile_weight = tables
+    rows = pack_rows(boards)
+    columns = pack_rows(boards.transpose(0, 2, 1))
+    score = (row_table[rows[:, 0]] + row_table[rows[:, 1]] + row_table[rows[:, 2]] + row_table[rows[:, 3]] +
+             column_table[columns[:, 0]] + column_table[columns[:, 1]] +
+             column_table[columns[:, 2]] + column_table[columns[:, 3]])
+    if max_tile_weight:
+        score = score + max_tile_weight * MAX_TILE_ARRAY[rows].max(axis=1)
+    return score
+
+
+# A batch of 2048 games that are advanced together
+class BatchGame2048:
+    def __init__(self, num_games, seed=None, game_seeds=None):
+        # Each game draws its tile spawns from its own seed (random ones are picked unless game_seeds is given)
+        if game_seeds is None:
+            game_seeds = np.random.default_rng(seed).integers(0, 2 ** 63, size=num_games)
+        self.game_seeds = np.asarray(game_seeds, dtype=np.uint64)
+        self.spawns = np.zeros(num_games, dtype=np.uint64)  # Number of random draws made by each game
+        self.boards = np.zeros((num_games, 4, 4), dtype=np.uint8)
+        self.points = np.zeros(num_games, dtype=np.int64)
+        self.moves = np.zeros(num_games, dtype=np.int64)
+        self.active = np.ones(num_games, dtype=bool)  # Games that still have a legal move
+
+        every_game = np.arange(num_games)
+        self.add_random_tiles(every_game)
+        self.add_random_tiles(every_game)
+
+    # Adds a 2 or 4 tile (2 appears with 90% probability) in a random empty cell of each of the given boards
+    def add_random_tiles(self, games):
+        flat = self.boards[games].reshape(len(games), 16)
+        empty = flat == 0
+        seeds = self.game_seeds[games]
+        draws = self.spawns[games]
+        cell_random = counter_random(seeds, draws)
+        tile_random = counter_random(seeds, draws + np.uint64(1))
+        self.spawns[games] += np.uint64(2)
+
+        # Pick the k-th empty cell of each board, where k is uniform over the number of empty cells
+        empty_counts = empty.sum(axis=1)
+        targets = (cell_random * empty_counts).astype(np.int64)
+        cells = (empty.cumsum(axis=1) > targets[:, np.newaxis]).argmax(axis=1)
+        exponents = np.where(tile_random < 0.9, 1, 2).astype(np.uint8)
+        has_empty = empty_counts > 0
+        flat[has_empty, cells[has_empty]] = exponents[has_empty]
+        self.boards[games] = flat.reshape(len(games), 4, 4)
+
+    # Plays one greedy move on every active board and retires the games that have no legal move
+    def step(self, tables):
+        games = np.flatnonzero(self.active)
+        boards = self.boards[games]
+
+        # Boards and scores resulting from each direction as (4, n, 4, 4) and (4, n) arrays
+        results = [move_boards(boards, direction) for direction in DIRECTIONS]
+        new_boards = np.stack([result[0] for result in results])
+        scores = np.stack([result[1] for result in results])
+        legal = (new_boards != boards).any(axis=(2, 3))
+
+        # Score every afterstate and pick the best legal direction (ties go to the first in DIRECTIONS order, like
+        # find_best_move, and the scores match the scalar evaluator exactly so the same boards get the same moves)
+        evaluations = evaluate_boards(new_boards.reshape(-1, 4, 4), tables).reshape(len(DIRECTIONS), len(games))
+        best = np.where(legal, evaluations, -np.inf).argmax(axis=0)
+
+        # Apply the chosen moves to the games that still had one
+        has_move = legal.any(axis=0)
+        self.active[games[~has_move]] = False
+        moved = np.flatnonzero(has_move)
+        best = best[moved]
+        games = games[moved]
+        self.boards[games] = new_boards[best, moved]
+        self.points[games] += scores[best, moved]
+        self.moves[games] += 1
+        self.add_random_tiles(games)
+
+    # Plays every game to completion (or until max_moves) and returns the final scores
+    def play(self, weights, max_moves=10000):
+        tables = evaluation_tables(weights)
+        for _ in range(max_moves):
+            if not self.active.any():
+                break
+            self.step(tables)
+        return self.points
+
+
+# Plays a batch of games with the greedy policy and returns the final score of every game
+def play_games(weights, num_games=10000, seed=None, max_moves=10000, game_seeds=None):
+    return BatchGame2048(num_games, seed, game_seeds).play(weights, max_moves)
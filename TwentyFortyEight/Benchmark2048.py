@@ -0,0 +1,246 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game04 - 2048
+#  Last updated:  10/18/26
+#  Description: This program benchmarks the throughput of the 2048 move, evaluation and solver code without a window
+""" A multi-day optimization run is only as fast as the engine underneath it, so this program measures the hot paths
+before one is started: single moves (list-of-lists and bitboard), board evaluations (the original evaluate function, the
+table-based evaluator and the n-tuple network), greedy and expectimax move searches, and complete games played with
+fixed tile spawn seeds, both one at a time and in the NumPy batch simulator. Every benchmark works on a fixed corpus of
+mid-game and late-game boards saved in benchmark_boards.json, so the work done is identical between runs. Expectimax is
+also run on larger (and smaller) boards, taken from seeded greedy games of each size, as a stress test. Each benchmark
+is repeated and the best time is kept to reduce noise. Results are written as JSON and can be compared against a saved
+baseline, which flags any benchmark whose rate dropped by more than a tolerance. """
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+from datetime import datetime
+from Bitboard2048 import DIRECTIONS, execute_move, decode_board, max_tile
+from Engine2048 import Game2048, EVALUATION_WEIGHTS, simulate_move, evaluate, backend_for_size
+from HeuristicTables2048 import HeuristicEvaluator, evaluator_for_size
+from Expectimax2048 import ExpectimaxSearch
+from NTuple2048 import NTupleNetwork
+from Optimize_2048_V2 import find_best_move, play_game
+from BatchSimulator2048 import play_games
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_boards.json")
+BENCHMARK_WEIGHTS = EVALUATION_WEIGHTS + [0.0]
+GAME_SEEDS = list(range(1, 21))  # Tile spawn seeds for full game playouts
+STRESS_SIZES = (3, 5, 6, 8)  # Board sizes of the expectimax stress benchmarks
+
+
+# Plays seeded greedy games and samples boards whose largest tile falls in the mid-game and late-game ranges
+def build_corpus(boards_per_stage=64, seed=2048):
+    stages = {"mid": (256, 512), "late": (1024, 4096)}
+    corpus = {stage: [] for stage in stages}
+    game_seed = seed
+    while any(len(boards) < boards_per_stage for boards in corpus.values()):
+        game = Game2048(game_seed)
+        game_seed += 1
+        while True:
+            best_move = find_best_move(game.board, BENCHMARK_WEIGHTS)
+            if best_move is None or game.moves > 10000:
+                break
+            game.move(best_move)
+            # Take every 25th board so one game does not fill a stage with near-identical positions
+            if game.moves % 25 == 0:
+                for stage, (low, high) in stages.items():
+                    if low <= max_tile(game.board) <= high and len(corpus[stage]) < boards_per_stage:
+                        corpus[stage].append(game.board)
+    return corpus
+
+
+# Plays a seeded greedy game on a board of the given size and returns every interval-th board (up to count of them)
+def build_size_boards(size, count=8, interval=20, seed=2048):
+    game = Game2048(seed, backend_for_size(size))
+    boards = []
+    while len(boards) < count:
+        best_move = find_best_move(game.board, BENCHMARK_WEIGHTS, size)
+        if best_move is None:
+            break
+        game.move(best_move)
+        if game.moves % interval == 0:
+            boards.append(game.board)
+    return boards
+
+
+# Loads the board corpus (stored as hexadecimal bitboards), creating it first if it does not exist
+def load_corpus(path=CORPUS_FILE):
+    if not os.path.exists(path):
+        corpus = build_corpus()
+        with open(path, "w") as file:
+            json.dump({stage: [f"{board:016x}" for board in boards] for stage, boards in corpus.items()}, file,
+                      indent=1)
+    with open(path) as file:
+        return {stage: [int(board, 16) for board in boards] for stage, boards in json.load(file).items()}
+
+
+# Runs a benchmark function several times and returns the best time along with the number of operations done
+def time_benchmark(function, repeat):
+    best_seconds = float('inf')
+    operations = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operations = function()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    return operations, best_seconds
+
+
+# Builds the benchmark functions; each one does a fixed amount of work and returns its operation count
+def build_benchmarks(boards, quick=False, selected=None):
+    grids = [decode_board(board) for board in boards]
+    evaluator = HeuristicEvaluator(EVALUATION_WEIGHTS)
+    network = NTupleNetwork()  # Lookup cost does not depend on the weights, so an untrained network is enough
+    solver = ExpectimaxSearch(evaluator.evaluate, max_depth=2, time_limit=None)  # Fixed depth, not a time budget
+    loops = 1 if quick else 20
+    game_seeds = GAME_SEEDS[:4] if quick else GAME_SEEDS
+    batch_games = 200 if quick else 2000
+    search_count = 8 if quick else 32
+    search_boards = boards[::max(1, len(boards) // search_count)][:search_count]  # Stride over mid and late boards
+    find_best_move(boards[0], BENCHMARK_WEIGHTS)  # Build the greedy solver's tables before anything is timed
+
+    # Boards and fixed-depth solvers for the other board sizes (only those whose benchmark will be run)
+    stress_sizes = [size for size in STRESS_SIZES if not selected or f"expectimax_{size}x{size}" in selected]
+    size_boards = {size: build_size_boards(size, 2 if quick else 8) for size in stress_sizes}
+    size_solvers = {}
+    for size in stress_sizes:
+        size_evaluator = evaluator_for_size(size)
+        size_evaluator.set_weights(BENCHMARK_WEIGHTS)
+        size_solvers[size] = ExpectimaxSearch(size_evaluator.evaluate, max_depth=2, time_limit=None,
+                                              backend=backend_for_size(size))
+
+    def simulate_moves():
+        for _ in range(loops):
+            for grid in grids:
+                for direction in DIRECTIONS:
+                    simulate_move(grid, direction)
+        return loops * len(grids) * len(DIRECTIONS)
+
+    def bitboard_moves():
+        for _ in range(loops * 10):
+            for board in boards:
+                for direction in DIRECTIONS:
+                    execute_move(board, direction)
+        return loops * 10 * len(boards) * len(DIRECTIONS)
+
+    def grid_evaluations():
+        for _ in range(loops):
+            for grid in grids:
+                evaluate(grid)
+        return loops * len(grids)
+
+    def table_evaluations():
+        for _ in range(loops * 10):
+            for board in boards:
+                evaluator.evaluate(board)
+        return loops * 10 * len(boards)
+
+    def network_evaluations():
+        for _ in range(loops):
+            for board in boards:
+                network.evaluate(board)
+        return loops * len(boards)
+
+    def greedy_searches():
+        for _ in range(loops):
+            for board in boards:
+                find_best_move(board, BENCHMARK_WEIGHTS)
+        return loops * len(boards)
+
+    def expectimax_searches():
+        for board in search_boards:
+            solver.find_best_move(board)
+        return len(search_boards)
+
+    # Returns a benchmark that runs the expectimax solver on every board of one size
+    def size_expectimax_searches(size):
+        def searches():
+            for board in size_boards[size]:
+                size_solvers[size].find_best_move(board)
+            return len(size_boards[size])
+        return searches
+
+    def game_playouts():
+        for seed in game_seeds:
+            play_game(BENCHMARK_WEIGHTS, seed)
+        return len(game_seeds)
+
+    def batch_playouts():
+        play_games(BENCHMARK_WEIGHTS, batch_games, game_seeds=range(batch_games))
+        return batch_games
+
+    # Name: (function, unit)
+    benchmarks = {
+        "simulate_move": (simulate_moves, "moves/sec"),
+        "execute_move": (bitboard_moves, "moves/sec"),
+        "evaluate": (grid_evaluations, "evals/sec"),
+        "evaluate_table": (table_evaluations, "evals/sec"),
+        "evaluate_ntuple": (network_evaluations, "evals/sec"),
+        "find_best_move_greedy": (greedy_searches, "searches/sec"),
+        "find_best_move_expectimax": (expectimax_searches, "searches/sec"),
+        "game_playout": (game_playouts, "games/sec"),
+        "batch_playout": (batch_playouts, "games/sec"),
+    }
+    for size in stress_sizes:
+        benchmarks[f"expectimax_{size}x{size}"] = (size_expectimax_searches(size), "searches/sec")
+    return benchmarks
+
+
+# Runs every benchmark (or the selected ones) and returns the results with details about the machine
+def run_benchmarks(repeat=3, quick=False, selected=None):
+    corpus = load_corpus()
+    boards = [board for stage_boards in corpus.values() for board in stage_boards]
+    results = {}
+    for name, (function, unit) in build_benchmarks(boards, quick, selected).items():
+        if selected and name not in selected:
+            continue
+        operations, seconds = time_benchmark(function, repeat)
+        results[name] = {"rate": operations / seconds, "unit": unit, "operations": operations, "seconds": seconds}
+        print(f"{name:<28}{operations / seconds:>16,.1f} {unit}")
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "quick": quick,
+        "repeat": repeat,
+        "corpus_boards": {stage: len(stage_boards) for stage, stage_boards in corpus.items()},
+        "results": results,
+    }
+
+
+# Compares results against a baseline and returns the names of benchmarks that slowed down beyond the tolerance
+def compare_results(baseline, results, tolerance=0.1):
+    regressions = []
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = result["rate"] / baseline["results"][name]["rate"]
+        status = "REGRESSION" if ratio < 1 - tolerance else "ok"
+        if status == "REGRESSION":
+            regressions.append(name)
+        print(f"{name:<28}{ratio:>8.2f}x  {status}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the 2048 engine, evaluators and solvers.")
+    parser.add_argument("--output", default="benchmark_results.json", help="file that receives the results")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed slowdown before flagging (0.1 = 10%%)")
+    parser.add_argument("--repeat", type=int, default=3, help="times each benchmark is run (the best is kept)")
+    parser.add_argument("--quick", action="store_true", help="do less work per benchmark for a fast check")
+    parser.add_argument("--only", nargs="+", help="names of the benchmarks to run")
+    args = parser.parse_args()
+
+    benchmark_results = run_benchmarks(args.repeat, args.quick, args.only)
+    with open(args.output, "w") as output_file:
+        json.dump(benchmark_results, output_file, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            if compare_results(json.load(baseline_file), benchmark_results, args.tolerance):
+                sys.exit(1)
@@ -0,0 +1,237 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game04 - 2048
+#  Last updated:  10/18/26
+#  Description: This program implements a packed 64-bit 2048 board with precomputed row-move lookup tables
+""" The board is packed into a single 64-bit integer where every cell holds the base-2 exponent of its tile in 4 bits
+(0 for an empty cell, 1 for a 2 tile, 2 for a 4 tile, ...). Row r occupies bits 16r to 16r + 15 and column c of that
+row occupies the 4 bits starting at 4c, so a single row is a 16-bit integer. Since there are only 65,536 possible rows,
+the result of sliding every possible row left or right (and the points scored by its merges) is computed once at import
+time. A move is then four table lookups, and vertical moves transpose the board so columns can be treated as rows. """
+import random
+
+# Move directions understood by the bitboard engine
+LEFT = 0
+RIGHT = 1
+UP = 2
+DOWN = 3
+DIRECTIONS = (LEFT, RIGHT, UP, DOWN)
+
+ROW_MASK = 0xFFFF
+MAX_EXPONENT = 0xF  # Largest exponent that fits in a cell (32768)
+
+
+# Slides and merges a row of exponents to the left and returns the new row along with the points scored. Tiles at
+# max_exponent (the largest exponent a cell can hold) do not merge
+def slide_row_left(exponents, max_exponent=MAX_EXPONENT):
+    tiles = [exponent for exponent in exponents if exponent != 0]  # Remove empty cells (shift left)
+    merged_row = []
+    score = 0
+    i = 0
+    while i < len(tiles):
+        # Merge adjacent tiles if they have the same value (a tile can only merge once per move)
+        if i < len(tiles) - 1 and tiles[i] == tiles[i + 1] and tiles[i] != max_exponent:
+            merged_row.append(tiles[i] + 1)
+            score += 1 << (tiles[i] + 1)  # Add the merged tile value to the score
+            i += 2
+        else:
+            merged_row.append(tiles[i])
+            i += 1
+    return merged_row + [0] * (len(exponents) - len(merged_row)), score
+
+
+# Unpacks a 16-bit row into a list of four exponents (column 0 first)
+def unpack_row(row):
+    return [(row >> (4 * c)) & 0xF for c in range(4)]
+
+
+# Packs a list of four exponents (column 0 first) into a 16-bit row
+def pack_row(exponents):
+    row = 0
+    for c, exponent in enumerate(exponents):
+        row |= exponent << (4 * c)
+    return row
+
+
+# Reverses the order of the four cells in a 16-bit row
+def reverse_row(row):
+    return ((row >> 12) & 0xF) | ((row >> 4) & 0xF0) | ((row << 4) & 0xF00) | ((row << 12) & 0xF000)
+
+
+# Builds the left/right row-move tables and their score deltas for all 65,536 possible rows
+def build_row_tables():
+    left_table = [0] * 65536
+    right_table = [0] * 65536
+    left_score_table = [0] * 65536
+    right_score_table = [0] * 65536
+
+    for row in range(65536):
+        merged_row, score = slide_row_left(unpack_row(row))
+        left_table[row] = pack_row(merged_row)
+        left_score_table[row] = score
+
+        # Moving right is moving the reversed row left and reversing the result back
+        merged_row, score = slide_row_left(unpack_row(reverse_row(row)))
+        right_table[row] = reverse_row(pack_row(merged_row))
+        right_score_table[row] = score
+
+    return left_table, right_table, left_score_table, right_score_table
+
+
+ROW_LEFT_TABLE, ROW_RIGHT_TABLE, ROW_LEFT_SCORE_TABLE, ROW_RIGHT_SCORE_TABLE = build_row_tables()
+
+
+# Checks if sliding a row of exponents left would change it (a tile has a gap or an equal neighbour to its left)
+def row_can_move_left(exponents):
+    for i in range(len(exponents) - 1):
+        if exponents[i] == 0 and exponents[i + 1] != 0:
+            return True  # Tile can slide into the gap
+        if exponents[i] != 0 and exponents[i] == exponents[i + 1] and exponents[i] != MAX_EXPONENT:
+            return True  # Tiles can merge
+    return False
+
+
+# Builds the move-legality tables for all 65,536 possible rows (1 if the move changes the row)
+def build_legality_tables():
+    left_table = bytearray(65536)
+    right_table = bytearray(65536)
+    for row in range(65536):
+        exponents = unpack_row(row)
+        left_table[row] = row_can_move_left(exponents)
+        right_table[row] = row_can_move_left(exponents[::-1])
+    return left_table, right_table
+
+
+ROW_CAN_MOVE_LEFT, ROW_CAN_MOVE_RIGHT = build_legality_tables()
+
+
+# Transposes the board so that columns become rows (and rows become columns)
+def transpose(board):
+    # Transpose each 2x2 block of cells, then swap the two off-diagonal 2x2 blocks
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+# Applies the row tables to every row of the board and returns the new board and the points scored
+def move_rows(board, row_table, score_table):
+    r0 = board & ROW_MASK
+    r1 = (board >> 16) & ROW_MASK
+    r2 = (board >> 32) & ROW_MASK
+    r3 = (board >> 48) & ROW_MASK
+    new_board = row_table[r0] | (row_table[r1] << 16) | (row_table[r2] << 32) | (row_table[r3] << 48)
+    return new_board, score_table[r0] + score_table[r1] + score_table[r2] + score_table[r3]
+
+
+# Moves the board in the given direction and returns the new board and the points scored by merges
+def execute_move(board, direction):
+    if direction == LEFT:
+        return move_rows(board, ROW_LEFT_TABLE, ROW_LEFT_SCORE_TABLE)
+    if direction == RIGHT:
+        return move_rows(board, ROW_RIGHT_TABLE, ROW_RIGHT_SCORE_TABLE)
+
+    # Vertical moves slide the columns of the transposed board (up is left and down is right)
+    if direction == UP:
+        new_board, score = move_rows(transpose(board), ROW_LEFT_TABLE, ROW_LEFT_SCORE_TABLE)
+    else:
+        new_board, score = move_rows(transpose(board), ROW_RIGHT_TABLE, ROW_RIGHT_SCORE_TABLE)
+    return transpose(new_board), score
+
+
+# Checks if any row of the board can slide or merge according to the given legality table
+def rows_can_move(board, table):
+    return bool(table[board & ROW_MASK] or table[(board >> 16) & ROW_MASK] or
+                table[(board >> 32) & ROW_MASK] or table[(board >> 48) & ROW_MASK])
+
+
+# Checks if moving in the given direction would change the board, without building the new board
+def can_move(board, direction):
+    if direction == LEFT:
+        return rows_can_move(board, ROW_CAN_MOVE_LEFT)
+    if direction == RIGHT:
+        return rows_can_move(board, ROW_CAN_MOVE_RIGHT)
+    if direction == UP:
+        return rows_can_move(transpose(board), ROW_CAN_MOVE_LEFT)
+    return rows_can_move(transpose(board), ROW_CAN_MOVE_RIGHT)
+
+
+# Returns the directions that would change the board
+def legal_moves(board):
+    columns = transpose(board)
+    moves = []
+    if rows_can_move(board, ROW_CAN_MOVE_LEFT):
+        moves.append(LEFT)
+    if rows_can_move(board, ROW_CAN_MOVE_RIGHT):
+        moves.append(RIGHT)
+    if rows_can_move(columns, ROW_CAN_MOVE_LEFT):
+        moves.append(UP)
+    if rows_can_move(columns, ROW_CAN_MOVE_RIGHT):
+        moves.append(DOWN)
+    return moves
+
+
+# Converts a list-of-lists board of tile values into a packed bitboard
+def encode_board(grid):
+    board = 0
+    for r, row in enumerate(grid):
+        for c, value in enumerate(row):
+            if value:
+                board |= (value.bit_length() - 1) << (16 * r + 4 * c)
+    return board
+
+
+# Converts a packed bitboard into a list-of-lists board of tile values
+def decode_board(board):
+    grid = []
+    for r in range(4):
+        row = []
+        for c in range(4):
+            exponent = (board >> (16 * r + 4 * c)) & 0xF
+            row.append(1 << exponent if exponent else 0)
+        grid.append(row)
+    return grid
+
+
+# Returns the tile value at the given row and column
+def get_tile(board, row, col):
+    exponent = (board >> (16 * row + 4 * col)) & 0xF
+    return 1 << exponent if exponent else 0
+
+
+# Returns the cell indices (row * 4 + col) of all empty cells
+def empty_cells(board):
+    return [index for index in range(16) if not (board >> (4 * index)) & 0xF]
+
+
+# Counts the empty cells on the board
+def count_empty(board):
+    return sum(1 for index in range(16) if not (board >> (4 * index)) & 0xF)
+
+
+# Returns the largest tile value on the board
+def max_tile(board):
+    exponent = max((board >> (4 * index)) & 0xF for index in range(16))
+    return 1 << exponent if exponent else 0
+
+
+# Returns the sum of all tile values on the board
+def tile_sum(board):
+    total = 0
+    for index in range(16):
+        exponent = (board >> (4 * index)) & 0xF
+        if exponent:
+            total += 1 << exponent
+    return total
+
+
+# Adds a 2 or 4 tile (2 appears with 90% probability) in a random empty cell and returns the new board
+def add_random_tile(board, rng=random):
+    cells = empty_cells(board)
+    if not cells:
+        return board
+    index = rng.choice(cells)
+    return board | ((1 if rng.random() < 0.9 else 2) << (4 * index))
@@ -0,0 +1,422 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game04 - 2048
+#  Last updated:  10/18/26
+#  Description: This program implements the headless 2048 game shared by the window, the optimizers and the benchmarks
+""" The rules of 2048 used to be repeated in the window, in simulate_move and in the dummy game of every optimizer, and
+the copies did not even agree on the score. Game2048 is now the only implementation of a game: it slides and merges
+tiles, scores the value of every merged tile, spawns new tiles from its own random number generator and detects the end
+of the game. It never imports PyQt5, so optimizer worker processes start quickly. The board itself is handled by a
+backend object, so the same game can run on the packed bitboard (the fast default) or on a plain list-of-lists grid
+that is easy to inspect. Every backend draws from the random number generator in the same order, so a seeded game plays
+out identically on any of them. The original list-of-lists heuristics also live here so they can be used without a
+window, and work on boards of any size.
+Boards from 3x3 to 8x8 are supported: the 4x4 game uses the 64-bit bitboard, and every other size uses PackedBackend,
+which packs the whole board into one Python integer (4 bits per cell up to 4x4, 5 bits above so tiles can grow past
+32768) and slides rows through row tables that are filled in the first time each row is seen (and emptied once they
+hold ROW_CACHE_LIMIT rows, since a long run on a large board sees far more rows than it is worth keeping). """
+import random
+from Bitboard2048 import (LEFT, RIGHT, UP, DOWN, DIRECTIONS, MAX_EXPONENT, slide_row_left, execute_move, legal_moves,
+                          encode_board, decode_board, get_tile, max_tile, add_random_tile, empty_cells)
+
+# Weights of the heuristic evaluation (empty cells, monotonicity, merge potential, smoothness)
+EVALUATION_WEIGHTS = [6.4, 3.1, 3.7, 2.7]
+
+# Supported board sizes (cells per side)
+MIN_BOARD_SIZE = 3
+MAX_BOARD_SIZE = 8
+
+ROW_CACHE_LIMIT = 1 << 17  # Rows a PackedBackend row table (or an evaluator row cache) holds before it is emptied
+
+
+# Board backend for packed 64-bit bitboards (see Bitboard2048)
+class BitboardBackend:
+    size = 4
+    cell_bits = 4
+
+    # Returns a board with no tiles
+    def empty_board(self):
+        return 0
+
+    # Returns the board after moving in the given direction and the points scored by merges
+    def execute_move(self, board, direction):
+        return execute_move(board, direction)
+
+    # Returns the directions that change the board
+    def legal_moves(self, board):
+        return legal_moves(board)
+
+    # Adds a 2 or 4 tile in a random empty cell and returns the new board
+    def add_random_tile(self, board, rng):
+        return add_random_tile(board, rng)
+
+    # Returns the (cell index, exponent) of the tile that was added to old_board to give new_board
+    def spawned_tile(self, old_board, new_board):
+        index = ((old_board ^ new_board).bit_length() - 1) // 4
+        return index, (new_board >> (4 * index)) & 0xF
+
+    # Returns the cell indices (row * size + col) of all empty cells
+    def empty_cells(self, board):
+        return empty_cells(board)
+
+    # Returns the board with a tile of the given exponent placed in an empty cell
+    def place_tile(self, board, index, exponent):
+        return board | (exponent << (4 * index))
+
+    # Returns the tile value at the given row and column
+    def get_tile(self, board, row, col):
+        return get_tile(board, row, col)
+
+    # Returns the largest tile value on the board
+    def max_tile(self, board):
+        return max_tile(board)
+
+    # Converts the board into a list-of-lists of tile values
+    def to_grid(self, board):
+        return decode_board(board)
+
+    # Converts a list-of-lists of tile values into a board
+    def from_grid(self, grid):
+        return encode_board(grid)
+
+
+# Board backend for tuples of rows of tile exponents, which works for any board size
+class GridBackend:
+    def __init__(self, size=4):
+        self.size = size
+
+    # Returns a board with no tiles
+    def empty_board(self):
+        return tuple((0,) * self.size for _ in range(self.size))
+
+    # Returns the board after moving in the given direction and the points scored by merges
+    def execute_move(self, board, direction):
+        # Vertical moves slide the columns, so work on the transposed board (up is left and down is right)
+        lines = tuple(zip(*board)) if direction in (UP, DOWN) else board
+        new_lines = []
+        score = 0
+        for line in lines:
+            if direction in (LEFT, UP):
+                new_line, line_score = slide_row_left(line)
+            else:
+                new_line, line_score = slide_row_left(line[::-1])
+                new_line = new_line[::-1]
+            new_lines.append(tuple(new_line))
+            score += line_score
+        new_board = tuple(zip(*new_lines)) if direction in (UP, DOWN) else tuple(new_lines)
+        return new_board, score
+
+    # Returns the directions that change the board
+    def legal_moves(self, board):
+        return [direction for direction in DIRECTIONS if self.execute_move(board, direction)[0] != board]
+
+    # Adds a 2 or 4 tile in a random empty cell and returns the new board (same random draws as the bitboard)
+    def add_random_tile(self, board, rng):
+        cells = [row * self.size + col for row in range(self.size) for col in range(self.size) if not board[row][col]]
+        if not cells:
+            return board
+        row, col = divmod(rng.choice(cells), self.size)
+        grid = [list(line) for line in board]
+        grid[row][col] = 1 if rng.random() < 0.9 else 2
+        return tuple(tuple(line) for line in grid)
+
+    # Returns the (cell index, exponent) of the tile that was added to old_board to give new_board
+    def spawned_tile(self, old_board, new_board):
+        for index in range(self.size * self.size):
+            row, col = divmod(index, self.size)
+            if old_board[row][col] != new_board[row][col]:
+                return index, new_board[row][col]
+        return None
+
+    # Returns the cell indices (row * size + col) of all empty cells
+    def empty_cells(self, board):
+        return [row * self.size + col for row in range(self.size) for col in range(self.size) if not board[row][col]]
+
+    # Returns the board with a tile of the given exponent placed in an empty cell
+    def place_tile(self, board, index, exponent):
+        row, col = divmod(index, self.size)
+        return tuple(line[:col] + (exponent,) + line[col + 1:] if r == row else line for r, line in enumerate(board))
+
+    # Returns the tile value at the given row and column
+    def get_tile(self, board, row, col):
+        exponent = board[row][col]
+        return 1 << exponent if exponent else 0
+
+    # Returns the largest tile value on the board
+    def max_tile(self, board):
+        exponent = max(max(line) for line in board)
+        return 1 << exponent if exponent else 0
+
+    # Converts the board into a list-of-lists of tile values
+    def to_grid(self, board):
+        return [[1 << exponent if exponent else 0 for exponent in line] for line in board]
+
+    # Converts a list-of-lists of tile values into a board
+    def from_grid(self, grid):
+        return tuple(tuple(min(value.bit_length() - 1, MAX_EXPONENT) if value else 0 for value in line)
+                     for line in grid)
+
+
+# Board backend for NxN boards packed into one integer: cell (row, col) holds its exponent in the cell_bits bits
+# starting at (row * size + col) * cell_bits, so every row of the board is a row_bits-wide integer
+class PackedBackend:
+    def __init__(self, size):
+        if not MIN_BOARD_SIZE <= size <= MAX_BOARD_SIZE:
+            raise ValueError(f"Board size must be between {MIN_BOARD_SIZE} and {MAX_BOARD_SIZE}, got {size}")
+        self.size = size
+        self.cell_bits = 4 if size <= 4 else 5  # Larger boards leave room for tiles past 32768
+        self.cell_mask = (1 << self.cell_bits) - 1
+        self.max_exponent = self.cell_mask
+        self.row_bits = size * self.cell_bits
+        self.row_mask = (1 << self.row_bits) - 1
+        # Row-move tables (row -> (new row, points scored)), filled in as rows are seen since there are far too many
+        # possible rows on large boards to build them up front, and emptied when they reach ROW_CACHE_LIMIT rows
+        self.left_table = {}
+        self.right_table = {}
+
+    # Returns a board with no tiles
+    def empty_board(self):
+        return 0
+
+    # Unpacks a row into a list of exponents (column 0 first)
+    def unpack_row(self, row):
+        return [(row >> (self.cell_bits * c)) & self.cell_mask for c in range(self.size)]
+
+    # Packs a list of exponents (column 0 first) into a row
+    def pack_row(self, exponents):
+        row = 0
+        for c, exponent in enumerate(exponents):
+            row |= exponent << (self.cell_bits * c)
+        return row
+
+    # Returns the rows of the board as packed integers (row 0 first)
+    def rows(self, board):
+        return [(board >> (self.row_bits * r)) & self.row_mask for r in range(self.size)]
+
+    # Returns the columns of the board as packed rows (column 0 first)
+    def columns(self, board):
+        return self.rows(self.transpose(board))
+
+    # Transposes the board so that columns become rows (and rows become columns)
+    def transpose(self, board):
+        size, bits, mask = self.size, self.cell_bits, self.cell_mask
+        result = 0
+        for r in range(size):
+            for c in range(size):
+                result |= ((board >> (bits * (r * size + c))) & mask) << (bits * (c * size + r))
+        return result
+
+    # Returns (new row, points scored) for sliding a row left, or right when reverse is set, through the row tables
+    def move_row(self, row, reverse):
+        table = self.right_table if reverse else self.left_table
+        entry = table.get(row)
+        if entry is None:
+            exponents = self.unpack_row(row)
+            if reverse:
+                new_row, score = slide_row_left(exponents[::-1], self.max_exponent)
+                new_row.reverse()
+            else:
+                new_row, score = slide_row_left(exponents, self.max_exponent)
+            if len(table) >= ROW_CACHE_LIMIT:
+                table.clear()
+            entry = table[row] = (self.pack_row(new_row), score)
+        return entry
+
+    # Returns the board after moving in the given direction and the points scored by merges
+    def execute_move(self, board, direction):
+        # Vertical moves slide the columns of the transposed board (up is left and down is right)
+        vertical = direction in (UP, DOWN)
+        lines = self.transpose(board) if vertical else board
+        reverse = direction in (RIGHT, DOWN)
+        new_board = 0
+        score = 0
+        for r in range(self.size):
+            new_row, row_score = self.move_row((lines >> (self.row_bits * r)) & self.row_mask, reverse)
+            new_board |= new_row << (self.row_bits * r)
+            score += row_score
+        return (self.transpose(new_board) if vertical else new_board), score
+
+    # Returns the directions that change the board
+    def legal_moves(self, board):
+        return [direction for direction in DIRECTIONS if self.execute_move(board, direction)[0] != board]
+
+    # Returns the cell indices (row * size + col) of all empty cells
+    def empty_cells(self, board):
+        return [index for index in range(self.size * self.size)
+                if not (board >> (self.cell_bits * index)) & self.cell_mask]
+
+    # Returns the board with a tile of the given exponent placed in an empty cell
+    def place_tile(self, board, index, exponent):
+        return board | (exponent << (self.cell_bits * index))
+
+    # Adds a 2 or 4 tile in a random empty cell and returns the new board (same random draws as the bitboard)
+    def add_random_tile(self, board, rng):
+        cells = self.empty_cells(board)
+        if not cells:
+            return board
+        index = rng.choice(cells)
+        return self.place_tile(board, index, 1 if rng.random() < 0.9 else 2)
+
+    # Returns the (cell index, exponent) of the tile that was added to old_board to give new_board
+    def spawned_tile(self, old_board, new_board):
+        index = ((old_board ^ new_board).bit_length() - 1) // self.cell_bits
+        return index, (new_board >> (self.cell_bits * index)) & self.cell_mask
+
+    # Returns the tile value at the given row and column
+    def get_tile(self, board, row, col):
+        exponent = (board >> (self.cell_bits * (row * self.size + col))) & self.cell_mask
+        return 1 << exponent if exponent else 0
+
+    # Returns the largest tile value on the board
+    def max_tile(self, board):
+        exponent = max((board >> (self.cell_bits * index)) & self.cell_mask for index in range(self.size * self.size))
+        return 1 << exponent if exponent else 0
+
+    # Converts the board into a list-of-lists of tile values
+    def to_grid(self, board):
+        return [[self.get_tile(board, row, col) for col in range(self.size)] for row in range(self.size)]
+
+    # Converts a list-of-lists of tile values into a board
+    def from_grid(self, grid):
+        board = 0
+        for row, line in enumerate(grid):
+            for col, value in enumerate(line):
+                if value:
+                    board = self.place_tile(board, row * self.size + col,
+                                            min(value.bit_length() - 1, self.max_exponent))
+        return board
+
+
+BITBOARD_BACKEND = BitboardBackend()
+packed_backends = {}  # Shared PackedBackend per board size, so their row tables are only filled once
+
+
+# Returns the backend for a board size: the 64-bit bitboard for 4x4 and a PackedBackend for every other size
+def backend_for_size(size):
+    if size == 4:
+        return BITBOARD_BACKEND
+    if size not in packed_backends:
+        packed_backends[size] = PackedBackend(size)
+    return packed_backends[size]
+
+
+# Headless 2048 game: the board, the score, the move count and the tile spawn generator
+class Game2048:
+    def __init__(self, seed=None, backend=BITBOARD_BACKEND):
+        self.backend = backend
+        self.rng = random.Random(seed)  # Per-game tile spawn generator
+        self.board = None
+        self.points = 0
+        self.moves = 0
+        self.last_spawn = None  # (cell index, exponent) of the most recently added tile
+        self.reset()
+
+    # Starts a new game with two random tiles
+    def reset(self):
+        self.board = self.backend.empty_board()
+        self.points = 0
+        self.moves = 0
+        self.add_random_tile()
+        self.add_random_tile()
+
+    # Moves the tiles in the given direction, adds the merged tile values to the score and spawns a new tile.
+    # Returns False (and leaves the game untouched) if the move does not change the board
+    def move(self, direction):
+        new_board, score = self.backend.execute_move(self.board, direction)
+        if new_board == self.board:
+            return False
+        self.board = new_board
+        self.points += score
+        self.moves += 1
+        self.add_random_tile()
+        return True
+
+    # Adds a new tile (2 or 4) to a random empty cell on the board. 2 appears with 90% probability
+    def add_random_tile(self):
+        new_board = self.backend.add_random_tile(self.board, self.rng)
+        self.last_spawn = self.backend.spawned_tile(self.board, new_board) if new_board != self.board else None
+        self.board = new_board
+
+    # Returns the directions that change the board
+    def legal_moves(self):
+        return self.backend.legal_moves(self.board)
+
+    # Returns True when no move changes the board
+    def is_game_over(self):
+        return not self.backend.legal_moves(self.board)
+
+    # Returns the tile value at the given row and column
+    def get_tile(self, row, col):
+        return self.backend.get_tile(self.board, row, col)
+
+    # Returns the largest tile value on the board
+    def max_tile(self):
+        return self.backend.max_tile(self.board)
+
+    # Returns the board as a list-of-lists of tile values
+    def grid(self):
+        return self.backend.to_grid(self.board)
+
+
+#  Simulates a move on a given list-of-lists board without modifying the actual game state
+def simulate_move(board, direction):
+    backend = backend_for_size(len(board))
+    new_board, _ = backend.execute_move(backend.from_grid(board), direction)
+    return backend.to_grid(new_board)
+
+
+#  Evaluates the monotonicity of the board (favoring tiles that decrease in order)
+def calculate_monotonicity(board):
+    size = len(board)
+    score = 0
+    for row in board:  # Check row-wise monotonicity
+        for i in range(size - 1):
+            if row[i] >= row[i + 1]:
+                score += row[i]
+            else:
+                score -= row[i + 1]  # Penalize disorder
+    for col in range(size):  # Check column-wise monotonicity
+        for i in range(size - 1):
+            if board[i][col] >= board[i + 1][col]:
+                score += board[i][col]
+            else:
+                score -= board[i + 1][col]  # Penalize disorder
+    return score
+
+
+#  Evaluates the board based on potential merges
+def calculate_merge_potential(board):
+    size = len(board)
+    score = 0
+    for row in range(size):
+        for col in range(size - 1):  # Encourage merging
+            if board[row][col] == board[row][col + 1]:
+                score += board[row][col] * 2
+            if board[col][row] == board[col + 1][row]:
+                score += board[col][row] * 2
+    return score
+
+
+#  Evaluates the smoothness of the board (penalizing large jumps in tile values)
+def calculate_smoothness(board):
+    size = len(board)
+    score = 0
+    for row in range(size):  # Row-wise smoothness check
+        for col in range(size - 1):
+            score -= abs(board[row][col] - board[row][col + 1])
+    for col in range(size):  # Column-wise smoothness check
+        for row in range(size - 1):
+            score -= abs(board[row][col] - board[row + 1][col])
+    return score
+
+
+#  Evaluates the overall board state using a weighted heuristic function
+def evaluate(board):
+    empty_cells = sum(row.count(0) for row in board)
+    monotonicity = calculate_monotonicity(board)
+    merge_potential = calculate_merge_potential(board)
+    smoothness = calculate_smoothness(board)
+    # max_tile = max(max(row) for row in board)
+    weights = EVALUATION_WEIGHTS
+
+    return ((weights[0] * empty_cells) + (weights[1] * monotonicity) +
+            (weights[2] * merge_potential) + (weights[3] * smoothness))
@@ -0,0 +1,272 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game04 - 2048
+#  Last updated:  10/18/26
+#  Description: This program implements a depth-limited expectimax search for the 2048 AI solver
+""" The greedy solver only looks at the board right after its own move, so it never considers where the next tile will
+spawn. Expectimax alternates between max nodes (the player picks the best of the four moves) and chance nodes (a 2 or 4
+tile spawns in any empty cell, using the same 90%/10% odds as add_random_tile) and returns the move with the best
+expected evaluation. Chance branches whose cumulative probability falls below a threshold are cut off and evaluated
+directly, results are cached in a transposition table keyed on the board and remaining depth, and the search deepens
+one ply at a time until a per-move time budget runs out so the cost of a move stays predictable.
+The subtrees below the root moves (and below each tile spawn that follows them) are independent, so
+ParallelExpectimaxSearch hands them to a pool of worker processes that share the same deadline, which lets a multi-core
+machine search deeper in the same time per move. The workers are spawned, never forked, so the search is safe to start
+from the window's solver thread. Both searches default to the 4x4 bitboard and take a PackedBackend to search boards of
+other sizes. """
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from Bitboard2048 import DIRECTIONS, execute_move, empty_cells
+
+SPAWN_PROBABILITIES = ((1, 0.9), (2, 0.1))  # (exponent, probability) for 2 and 4 tiles
+
+
+# Returns the move function, the empty cell function and the bits per cell of a backend's packed boards (the 4x4
+# bitboard functions when no backend is given)
+def board_operations(backend):
+    if backend is None:
+        return execute_move, empty_cells, 4
+    return backend.execute_move, backend.empty_cells, backend.cell_bits
+
+
+# Raised inside the search when the time budget for the current move is spent
+class SearchTimeout(Exception):
+    pass
+
+
+# Depth-limited expectimax search over packed bitboards
+class ExpectimaxSearch:
+    def __init__(self, evaluator, max_depth=3, min_probability=0.0001, time_limit=0.1, loss_penalty=1e6,
+                 move_scores=False, backend=None):
+        """
+        Parameters:
+          evaluator: Function that scores a bitboard (higher is better).
+          max_depth: Maximum number of player moves to look ahead.
+          min_probability: Chance branches less likely than this are evaluated without searching deeper.
+          time_limit: Seconds allowed per move; None searches to max_depth regardless of time.
+          loss_penalty: Amount subtracted from the evaluation of a board with no legal moves.
+          move_scores: Add the points scored by each move to its value (for evaluators that predict the points still
+                       to be scored, such as a trained NTupleNetwork).
+          backend: PackedBackend (see Engine2048) for boards other than the 4x4 bitboard.
+        """
+        self.evaluator = evaluator
+        self.max_depth = max_depth
+        self.min_probability = min_probability
+        self.time_limit = time_limit
+        self.loss_penalty = loss_penalty
+        self.move_scores = move_scores
+        self.backend = backend
+        self.execute_move, self.empty_cells, self.cell_bits = board_operations(backend)
+        self.transposition_table = {}
+        self.deadline = None
+        self.nodes = 0
+        self.completed_depth = 0
+
+    # Returns the direction with the best expected evaluation, or None if no move changes the board
+    def find_best_move(self, board):
+        moves = [(direction, new_board, score) for direction in DIRECTIONS
+                 for new_board, score in [self.execute_move(board, direction)] if new_board != board]
+        if not moves:
+            return None
+
+        self.nodes = 0
+        self.completed_depth = 0
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.transposition_table.clear()  # Entries are keyed on depth, so they stay valid across iterations
+        best_move = moves[0][0]
+
+        # Iterative deepening: keep the result of the deepest search that finished within the time budget
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best_move = self.search_root(moves, depth)
+            except SearchTimeout:
+                break
+            self.completed_depth = depth
+
+        return best_move
+
+    # Searches every legal root move to the given depth and returns the best direction
+    def search_root(self, moves, depth):
+        best_move = None
+        best_value = float('-inf')
+        for direction, new_board, score in moves:
+            value = self.chance_node(new_board, depth, 1.0)
+            if self.move_scores:
+                value += score
+            if value > best_value:
+                best_value = value
+                best_move = direction
+        return best_move
+
+    # Player node: returns the value of the best move from this board
+    def max_node(self, board, depth, probability):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        self.nodes += 1
+
+        best_value = None
+        execute = self.execute_move
+        for direction in DIRECTIONS:
+            new_board, score = execute(board, direction)
+            if new_board != board:
+                value = self.chance_node(new_board, depth, probability)
+                if self.move_scores:
+                    value += score
+                if best_value is None or value > best_value:
+                    best_value = value
+
+        # No move changes the board, so the game is lost
+        if best_value is None:
+            return self.evaluator(board) - self.loss_penalty
+        return best_value
+
+    # Chance node: returns the expected value over every possible tile spawn
+    def chance_node(self, board, depth, probability):
+        # Stop at the depth limit or when this branch is too unlikely to matter
+        if depth <= 1 or probability < self.min_probability:
+            return self.evaluator(board)
+
+        key = (board, depth)
+        if key in self.transposition_table:
+            return self.transposition_table[key]
+
+        cells = self.empty_cells(board)
+        if not cells:
+            return self.max_node(board, depth - 1, probability)
+
+        expected_value = 0.0
+        for index in cells:
+            for exponent, spawn_probability in SPAWN_PROBABILITIES:
+                branch_probability = spawn_probability / len(cells)
+                new_board = board | (exponent << (self.cell_bits * index))
+                expected_value += branch_probability * self.max_node(new_board, depth - 1,
+                                                                     probability * branch_probability)
+
+        self.transposition_table[key] = expected_value
+        return expected_value
+
+
+worker_search = None  # ExpectimaxSearch owned by each worker process of a ParallelExpectimaxSearch
+
+
+# Creates the search used by a worker process (runs once per process, so the evaluator is only sent once)
+def init_worker(evaluator, min_probability, loss_penalty, move_scores, backend=None):
+    global worker_search
+    worker_search = ExpectimaxSearch(evaluator, min_probability=min_probability, time_limit=None,
+                                     loss_penalty=loss_penalty, move_scores=move_scores, backend=backend)
+    worker_search.root_id = None
+
+
+# Searches one subtree in a worker process. The deadline is wall-clock time shared by every worker; None is returned
+# if it passes before the subtree is finished
+def search_subtree(root_id, board, depth, probability, chance, deadline):
+    search = worker_search
+    if search.root_id != root_id:
+        search.transposition_table.clear()  # Entries stay valid across iterations, but not across root moves
+        search.root_id = root_id
+    search.deadline = None if deadline is None else time.perf_counter() + (deadline - time.time())
+    try:
+        if chance:
+            return search.chance_node(board, depth, probability)
+        return search.max_node(board, depth, probability)
+    except SearchTimeout:
+        return None
+
+
+# Root-parallel expectimax: the subtree of every root move (or of every tile spawn after it) is searched by a worker
+class ParallelExpectimaxSearch:
+    def __init__(self, evaluator, max_depth=4, min_probability=0.0001, time_limit=0.1, loss_penalty=1e6,
+                 move_scores=False, workers=None, split_spawns=False, backend=None):
+        """
+        Parameters:
+          evaluator: Picklable function that scores a bitboard (sent to each worker process once).
+          max_depth: Maximum number of player moves to look ahead.
+          min_probability: Chance branches less likely than this are evaluated without searching deeper.
+          time_limit: Seconds allowed per move, shared by all workers; None searches to max_depth.
+          loss_penalty: Amount subtracted from the evaluation of a board with no legal moves.
+          move_scores: Add the points scored by each move to its value.
+          workers: Number of worker processes (defaults to all cores).
+          split_spawns: Also split each root move by tile spawn, which gives more, smaller jobs than there are moves.
+          backend: PackedBackend (see Engine2048) for boards other than the 4x4 bitboard.
+        """
+        self.evaluator = evaluator
+        self.max_depth = max_depth
+        self.min_probability = min_probability
+        self.time_limit = time_limit
+        self.loss_penalty = loss_penalty
+        self.move_scores = move_scores
+        self.workers = workers
+        self.split_spawns = split_spawns
+        self.backend = backend
+        self.execute_move, self.empty_cells, self.cell_bits = board_operations(backend)
+        self.executor = None  # Started on the first search, so importing a module that creates a search is cheap
+        self.root_id = 0
+        self.completed_depth = 0
+
+    # Returns the direction with the best expected evaluation, or None if no move changes the board
+    def find_best_move(self, board):
+        moves = [(direction, new_board, score) for direction in DIRECTIONS
+                 for new_board, score in [self.execute_move(board, direction)] if new_board != board]
+        if not moves:
+            return None
+
+        if self.executor is None:
+            # Workers are spawned rather than forked: the window starts the search from its solver thread, and
+            # forking a process that runs threads (and has Qt loaded) can leave the child with locks it can never take
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=init_worker,
+                                                initargs=(self.evaluator, self.min_probability, self.loss_penalty,
+                                                          self.move_scores, self.backend))
+        self.root_id += 1
+        self.completed_depth = 0
+        deadline = None if self.time_limit is None else time.time() + self.time_limit
+        best_move = moves[0][0]
+
+        # Iterative deepening: keep the result of the deepest search that every worker finished in time
+        for depth in range(1, self.max_depth + 1):
+            values = self.search_root(moves, depth, deadline)
+            if values is None:
+                break
+            best_move = moves[values.index(max(values))][0]
+            self.completed_depth = depth
+
+        return best_move
+
+    # Searches every root move to the given depth in the workers and returns their values (None on a timeout)
+    def search_root(self, moves, depth, deadline):
+        jobs = []  # (root move index, weight of the job's value, future)
+        for index, (_, new_board, _) in enumerate(moves):
+            cells = self.empty_cells(new_board)
+            if self.split_spawns and depth > 1 and cells:
+                # Expand the chance node here and send each tile spawn to a worker as its own max node
+                for cell in cells:
+                    for exponent, spawn_probability in SPAWN_PROBABILITIES:
+                        branch_probability = spawn_probability / len(cells)
+                        jobs.append((index, branch_probability, self.executor.submit(
+                            search_subtree, self.root_id, new_board | (exponent << (self.cell_bits * cell)), depth - 1,
+                            branch_probability, False, deadline)))
+            else:
+                jobs.append((index, 1.0, self.executor.submit(
+                    search_subtree, self.root_id, new_board, depth, 1.0, True, deadline)))
+
+        values = [score if self.move_scores else 0.0 for _, _, score in moves]
+        timed_out = False
+        for index, weight, future in jobs:
+            value = future.result()
+            if value is None:
+                timed_out = True  # Keep collecting, the other jobs stop at the same deadline
+            else:
+                values[index] += weight * value
+        return None if timed_out else values
+
+    # Shuts down the worker processes
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,130 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game04 - 2048
+#  Last updated:  10/18/26
+#  Description: This program precomputes the 2048 evaluation heuristics for every packed row of a bitboard
+""" Every term of the weighted evaluation is a sum of independent row and column contributions: monotonicity, merge
+potential and smoothness only compare neighbouring cells within a row or a column, and the empty cell count is a sum
+over rows. Each term is therefore computed once for all 65,536 packed rows (a column of the board is a row of its
+transpose). Combining the terms with a set of weights gives one table for rows and one for columns, so evaluating a
+board is four row lookups, four column lookups and a sum. Changing the weights only recombines the raw tables, which
+is cheap enough to do every time the optimizer proposes a new candidate.
+Other board sizes (see PackedBackend in Engine2048) have too many possible rows for full tables, so the evaluator
+caches the weighted value of each row and column the first time it is seen instead (up to ROW_CACHE_LIMIT rows). """
+from Bitboard2048 import ROW_MASK, unpack_row, transpose
+from Engine2048 import ROW_CACHE_LIMIT, backend_for_size
+
+
+# Computes the raw heuristic terms of a single packed row of exponents (a row of a PackedBackend board if given)
+def row_heuristics(row, backend=None):
+    exponents = unpack_row(row) if backend is None else backend.unpack_row(row)
+    values = [1 << exponent if exponent else 0 for exponent in exponents]
+    empty = values.count(0)
+    monotonicity = 0
+    merge_potential = 0
+    smoothness = 0
+    for i in range(len(values) - 1):
+        # Favor tiles that decrease in order and penalize disorder
+        if values[i] >= values[i + 1]:
+            monotonicity += values[i]
+        else:
+            monotonicity -= values[i + 1]
+        # Encourage merging
+        if values[i] == values[i + 1]:
+            merge_potential += values[i] * 2
+        # Penalize large jumps in tile values
+        smoothness -= abs(values[i] - values[i + 1])
+    return empty, monotonicity, merge_potential, smoothness, max(values)
+
+
+# Builds the raw heuristic tables for all 65,536 possible rows
+def build_heuristic_tables():
+    tables = list(zip(*(row_heuristics(row) for row in range(65536))))
+    return tuple(list(table) for table in tables)
+
+
+EMPTY_TABLE, MONOTONICITY_TABLE, MERGE_TABLE, SMOOTHNESS_TABLE, MAX_TILE_TABLE = build_heuristic_tables()
+
+
+# Evaluates bitboards with a weighted sum of the precomputed heuristic tables (or, given a PackedBackend, boards of
+# its size with a weighted sum of cached row and column values)
+class HeuristicEvaluator:
+    def __init__(self, weights, backend=None):
+        self.backend = backend
+        self.weights = None
+        self.row_table = None
+        self.column_table = None
+        self.row_cache = {}  # Packed row -> (row value, column value, max tile), for PackedBackend boards
+        self.max_tile_weight = 0
+        self.set_weights(weights)
+
+    # Recombines the raw tables for a new set of weights (empty cells, monotonicity, merges, smoothness, max tile)
+    def set_weights(self, weights):
+        if weights == self.weights:
+            return
+        self.weights = list(weights)
+        w_empty, w_monotonicity, w_merge, w_smoothness = weights[:4]
+        self.max_tile_weight = weights[4] if len(weights) > 4 else 0
+        if self.backend is not None:
+            self.row_cache.clear()  # Cached rows are recombined with the new weights as they are seen again
+            return
+
+        # Column contributions share the row formulas, but empty cells are only counted once (by the rows)
+        self.column_table = [w_monotonicity * monotonicity + w_merge * merge + w_smoothness * smoothness
+                             for monotonicity, merge, smoothness
+                             in zip(MONOTONICITY_TABLE, MERGE_TABLE, SMOOTHNESS_TABLE)]
+        self.row_table = [w_empty * empty + column for empty, column in zip(EMPTY_TABLE, self.column_table)]
+
+    # Returns the (row value, column value, max tile) of a packed row of a PackedBackend board
+    def row_values(self, row):
+        values = self.row_cache.get(row)
+        if values is None:
+            empty, monotonicity, merge, smoothness, max_value = row_heuristics(row, self.backend)
+            w_empty, w_monotonicity, w_merge, w_smoothness = self.weights[:4]
+            if len(self.row_cache) >= ROW_CACHE_LIMIT:
+                self.row_cache.clear()  # Keep memory bounded on boards with too many possible rows to keep them all
+            column = w_monotonicity * monotonicity + w_merge * merge + w_smoothness * smoothness
+            values = self.row_cache[row] = (w_empty * empty + column, column, max_value)
+        return values
+
+    # Evaluates a PackedBackend board with one cached lookup per row and per column
+    def evaluate_packed(self, board):
+        score = 0
+        max_value = 0
+        for row in self.backend.rows(board):
+            row_value, _, row_max = self.row_values(row)
+            score += row_value
+            max_value = max(max_value, row_max)
+        for column in self.backend.columns(board):
+            score += self.row_values(column)[1]
+        if self.max_tile_weight:
+            score += self.max_tile_weight * max_value
+        return score
+
+    # Evaluates a packed bitboard with four row lookups and four column lookups
+    def evaluate(self, board):
+        if self.backend is not None:
+            return self.evaluate_packed(board)
+        row_table = self.row_table
+        column_table = self.column_table
+        columns = transpose(board)
+        r0 = board & ROW_MASK
+        r1 = (board >> 16) & ROW_MASK
+        r2 = (board >> 32) & ROW_MASK
+        r3 = (board >> 48) & ROW_MASK
+        score = (row_table[r0] + row_table[r1] + row_table[r2] + row_table[r3] +
+                 column_table[columns & ROW_MASK] + column_table[(columns >> 16) & ROW_MASK] +
+                 column_table[(columns >> 32) & ROW_MASK] + column_table[(columns >> 48) & ROW_MASK])
+        if self.max_tile_weight:
+            score += self.max_tile_weight * max(MAX_TILE_TABLE[r0], MAX_TILE_TABLE[r1],
+                                                MAX_TILE_TABLE[r2], MAX_TILE_TABLE[r3])
+        return score
+
+
+evaluators = {}  # Shared evaluator per board size, see evaluator_for_size
+
+
+# Returns the shared evaluator for a board size (the 4x4 one uses the full row tables); callers set its weights
+def evaluator_for_size(size):
+    if size not in evaluators:
+        evaluators[size] = HeuristicEvaluator([0.0] * 5, None if size == 4 else backend_for_size(size))
+    return evaluators[size]
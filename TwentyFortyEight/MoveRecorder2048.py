@@ -0,0 +1,132 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game04 - 2048
+#  Last updated:  10/18/26
+#  Description: This program records 2048 move histories as compact binary records and replays them
+""" A move history used to be a Python tuple per move that was only written out (as CSV) when the game was reset, so it
+grew without bound and was lost if the window was killed. The recorder instead appends one fixed-width 16-byte record
+per move to a binary file: the move number, the direction, the cell and exponent of the tile that spawned afterwards and
+the score. Every game starts with a record holding its packed starting board, so one file can hold any number of games.
+Records collect in a small buffer that is written to the file whenever it fills up or a short time has passed, which
+bounds both memory and the moves lost in a crash. The reader maps the file as a NumPy record array (a torn record at
+the end of the file is ignored), splits it into games and can replay any game move by move, checking every board and
+score along the way. """
+import csv
+import time
+import struct
+import numpy as np
+from Bitboard2048 import execute_move
+
+# Record kinds
+GAME_START = 0
+MOVE = 1
+
+# kind, direction, spawn cell, spawn exponent, move number, and the score (or the starting board of a game)
+RECORD_FORMAT = "<BBBBIQ"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+RECORD_DTYPE = np.dtype([("kind", "u1"), ("direction", "u1"), ("spawn_cell", "u1"), ("spawn_exponent", "u1"),
+                         ("move", "<u4"), ("value", "<u8")])
+NO_SPAWN = 0xFF  # Spawn cell of a move that was not followed by a new tile
+
+
+# Appends move records to a binary file through a buffer that is flushed when full or after flush_interval seconds
+class MoveRecorder:
+    def __init__(self, path, buffer_records=4096, flush_interval=1.0):
+        self.path = path
+        self.file = open(path, "ab")  # noqa: SIM115 (kept open until close or __exit__)
+        size = self.file.tell()
+        if size % RECORD_SIZE:
+            self.file.truncate(size - size % RECORD_SIZE)  # Drop a record torn by a crash so new records stay aligned
+        self.buffer = bytearray()
+        self.buffer_size = buffer_records * RECORD_SIZE
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+
+    # Records the packed starting board of a new game
+    def start_game(self, board):
+        self.append(struct.pack(RECORD_FORMAT, GAME_START, 0, NO_SPAWN, 0, 0, board))
+
+    # Records a move, the score after it and the tile that spawned (None if no tile spawned)
+    def record_move(self, move_number, direction, score, spawn):
+        spawn_cell, spawn_exponent = spawn if spawn is not None else (NO_SPAWN, 0)
+        self.append(struct.pack(RECORD_FORMAT, MOVE, direction, spawn_cell, spawn_exponent, move_number, score))
+
+    # Adds a packed record to the buffer and writes the buffer out if it is full or old enough
+    def append(self, record):
+        self.buffer += record
+        if len(self.buffer) >= self.buffer_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    # Writes every buffered record to the file
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.buffer.clear()
+        self.last_flush = time.monotonic()
+
+    # Flushes the remaining records and closes the file
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Maps a recording as a NumPy record array (read-only, without reading it into memory)
+def read_records(path):
+    with open(path, "rb") as file:
+        file.seek(0, 2)
+        count = file.tell() // RECORD_SIZE  # Ignore a partially written record at the end
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+
+# Splits a recording into one record array per game (each starting with its GAME_START record)
+def split_games(records):
+    starts = np.flatnonzero(records["kind"] == GAME_START)
+    return [records[start:end] for start, end in zip(starts, list(starts[1:]) + [len(records)])]
+
+
+# Replays a recorded game, yielding (move number, board, score) for the start and after every move. Every move is
+# checked against the recorded move number and score, so a damaged recording raises ValueError
+def replay_game(records):
+    if len(records) == 0 or records[0]["kind"] != GAME_START:
+        raise ValueError("A game must begin with a GAME_START record")
+    board = int(records[0]["value"])
+    points = 0
+    yield 0, board, points
+
+    for expected_move, record in enumerate(records[1:], start=1):
+        if record["kind"] != MOVE or record["move"] != expected_move:
+            raise ValueError(f"Unexpected record at move {expected_move}")
+        new_board, score = execute_move(board, int(record["direction"]))
+        if new_board == board:
+            raise ValueError(f"Move {expected_move} does not change the board")
+        points += score
+        if points != record["value"]:
+            raise ValueError(f"Score mismatch at move {expected_move}: replayed {points}, recorded {record['value']}")
+
+        # Place the tile that spawned after the move
+        if record["spawn_cell"] != NO_SPAWN:
+            shift = 4 * int(record["spawn_cell"])
+            if (new_board >> shift) & 0xF:
+                raise ValueError(f"Tile spawned on an occupied cell at move {expected_move}")
+            new_board |= int(record["spawn_exponent"]) << shift
+        board = new_board
+        yield expected_move, board, points
+
+
+# Writes the move numbers and scores of one recorded game (the last by default) as a CSV for PlotMoveHistory
+def export_csv(path, csv_path="moves.csv", game=-1):
+    records = split_games(read_records(path))[game][1:]
+    with open(csv_path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Move Number", "Score"])  # CSV header
+        writer.writerows(zip(records["move"].tolist(), records["value"].tolist()))
+    print(f"Move history saved to {csv_path}")
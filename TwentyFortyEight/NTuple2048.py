@@ -0,0 +1,202 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game04 - 2048
+#  Last updated:  10/18/26
+#  Description: This program implements an n-tuple network evaluator for 2048 that learns by temporal difference
+""" Instead of a hand-weighted sum of heuristics, an n-tuple network learns the value of a board directly from play.
+Each tuple is a fixed group of cells (a row, or a 2x2 square) and owns a table with one weight for every combination of
+tile exponents those cells can hold. The value of a board is the sum of the weights selected by every tuple, and each
+tuple is also applied to the 7 rotations and reflections of the board, so all symmetric positions share what is learned.
+To keep lookups cheap, the cells of a tuple are grouped by the row (or, via the transposed board, the column) they sit
+in, and a precomputed table turns a packed 16-bit row into that row's part of the tuple index.
+The network learns the value of afterstates (the board right after a move, before a tile spawns) with TD(0) self-play on
+the headless Game2048: after every move the previous afterstate's value is pulled towards the points just scored plus
+the value of the new afterstate. Weights are float32 NumPy tables saved as a .npy file (with the tuple layout in a JSON
+file next to it), so they can be memory-mapped instead of read into memory, and a network plugs into the expectimax
+solver like any other evaluator. """
+import os
+import json
+import random
+from array import array
+import numpy as np
+from Bitboard2048 import ROW_MASK, transpose, execute_move, legal_moves, max_tile
+from Engine2048 import Game2048
+
+# Default tuples: the outer and inner rows plus the corner, edge and center 2x2 squares (as (row, col) cells)
+DEFAULT_TUPLES = (
+    ((0, 0), (0, 1), (0, 2), (0, 3)),
+    ((1, 0), (1, 1), (1, 2), (1, 3)),
+    ((0, 0), (0, 1), (1, 0), (1, 1)),
+    ((0, 1), (0, 2), (1, 1), (1, 2)),
+    ((1, 1), (1, 2), (2, 1), (2, 2)),
+)
+
+partial_index_tables = {}  # Shared row-to-partial-index tables, keyed by ((col, position), ...)
+
+
+# Returns the 8 rotations and reflections of a tuple of (row, col) cells on the 4x4 board
+def symmetric_tuples(cells):
+    images = []
+    for reflect in (False, True):
+        image = [(r, 3 - c) if reflect else (r, c) for r, c in cells]
+        for _ in range(4):
+            image = [(c, 3 - r) for r, c in image]  # Rotate 90 degrees clockwise
+            if tuple(image) not in images:
+                images.append(tuple(image))
+    return images
+
+
+# Returns (building it once) the table that maps a packed row to its part of a tuple index
+def partial_index_table(key):
+    if key not in partial_index_tables:
+        table = array('I', bytes(4 * 65536))
+        for row in range(65536):
+            index = 0
+            for col, position in key:
+                index |= ((row >> (4 * col)) & 0xF) << (4 * position)
+            table[row] = index
+        partial_index_tables[key] = table
+    return partial_index_tables[key]
+
+
+# Splits one placement of a tuple into (line, partial index table) parts. Lines 0-3 are the rows of the board and
+# lines 4-7 are its columns, whichever needs fewer lookups
+def compile_feature(cells):
+    by_row = {}
+    by_col = {}
+    for position, (r, c) in enumerate(cells):
+        by_row.setdefault(r, []).append((c, position))
+        by_col.setdefault(c, []).append((r, position))
+    groups, offset = (by_row, 0) if len(by_row) <= len(by_col) else (by_col, 4)
+    return tuple((offset + line, partial_index_table(tuple(key))) for line, key in sorted(groups.items()))
+
+
+# Value function of a board made of symmetric n-tuples with one weight table per tuple
+class NTupleNetwork:
+    def __init__(self, tuples=DEFAULT_TUPLES, weights=None):
+        self.tuples = [tuple(tuple(cell) for cell in cells) for cells in tuples]
+        tuple_size = len(self.tuples[0])
+        if any(len(cells) != tuple_size for cells in self.tuples):
+            raise ValueError("Every tuple must have the same number of cells")
+        table_size = 16 ** tuple_size
+
+        if weights is None:
+            weights = np.zeros((len(self.tuples), table_size), dtype=np.float32)
+        if weights.shape != (len(self.tuples), table_size):
+            raise ValueError(f"Expected weights of shape {(len(self.tuples), table_size)}, got {weights.shape}")
+        self.weights = weights
+        self.flat_weights = weights.reshape(-1)  # A view, so updates change the tables
+
+        # Every symmetric placement of every tuple, as (offset of its table in flat_weights, parts)
+        self.features = [(table * table_size, compile_feature(cells))
+                         for table, base_cells in enumerate(self.tuples)
+                         for cells in symmetric_tuples(base_cells)]
+
+    # Returns the positions in flat_weights of the weights selected by every feature of the board
+    def feature_indices(self, board):
+        columns = transpose(board)
+        lines = (board & ROW_MASK, (board >> 16) & ROW_MASK, (board >> 32) & ROW_MASK, board >> 48,
+                 columns & ROW_MASK, (columns >> 16) & ROW_MASK, (columns >> 32) & ROW_MASK, columns >> 48)
+        indices = []
+        for offset, parts in self.features:
+            index = offset
+            for line, table in parts:
+                index += table[lines[line]]
+            indices.append(index)
+        return indices
+
+    # Returns the value of a board (the expected points still to be scored from it)
+    def evaluate(self, board):
+        return float(self.flat_weights[self.feature_indices(board)].sum())
+
+    # Returns the move with the most points plus afterstate value as (direction, afterstate, points, indices, value),
+    # or None if no move changes the board
+    def best_move(self, board):
+        best = None
+        best_total = float('-inf')
+        for direction in legal_moves(board):
+            afterstate, points = execute_move(board, direction)
+            indices = self.feature_indices(afterstate)
+            value = float(self.flat_weights[indices].sum())
+            if points + value > best_total:
+                best_total = points + value
+                best = (direction, afterstate, points, indices, value)
+        return best
+
+    # Moves the value of an afterstate towards a target by adding a share of the error to each of its weights
+    def update(self, indices, error, learning_rate):
+        np.add.at(self.flat_weights, indices, np.float32(learning_rate * error / len(indices)))
+
+    # Plays one game greedily while learning from it with TD(0) and returns the finished game
+    def train_game(self, seed=None, learning_rate=0.1):
+        game = Game2048(seed)
+        previous = None  # (indices, value) of the previous afterstate
+        while True:
+            move = self.best_move(game.board)
+            if move is None:
+                break
+            direction, _, points, indices, value = move
+            if previous is not None:
+                self.update(previous[0], points + value - previous[1], learning_rate)
+            game.move(direction)
+            previous = (indices, value)
+
+        # Nothing can be scored after the final afterstate
+        if previous is not None:
+            self.update(previous[0], -previous[1], learning_rate)
+        return game
+
+    # Trains by self-play, printing progress and saving the weights every save_interval games (if a path is given)
+    def train(self, num_games, learning_rate=0.1, seed=None, log_interval=100, path=None, save_interval=1000):
+        rng = random.Random(seed)
+        scores = []
+        max_tiles = []
+        for game_index in range(num_games):
+            game = self.train_game(rng.getrandbits(32), learning_rate)
+            scores.append(game.points)
+            max_tiles.append(max_tile(game.board))
+
+            if (game_index + 1) % log_interval == 0:
+                reached_2048 = sum(tile >= 2048 for tile in max_tiles) / len(max_tiles)
+                print(f"Games {game_index + 2 - log_interval}-{game_index + 1} -- Average Score: "
+                      f"{sum(scores) / len(scores):.1f}, Max Score: {max(scores)}, 2048 Rate: {reached_2048:.1%}")
+                scores = []
+                max_tiles = []
+            if path and (game_index + 1) % save_interval == 0:
+                self.save(path)
+        if path:
+            self.save(path)
+
+    # Saves the weights as a .npy file and the tuple layout as a JSON file with the same name
+    def save(self, path):
+        if isinstance(self.weights, np.memmap) and os.path.abspath(self.weights.filename) == os.path.abspath(path):
+            self.weights.flush()  # Trained in place, so the mapped file only needs to be written out
+        else:
+            temp_path = f"{path}.tmp.npy"
+            np.save(temp_path, self.weights)
+            os.replace(temp_path, path)  # Never leave a partially written weight file behind
+        with open(os.path.splitext(path)[0] + ".json", "w") as file:
+            json.dump({"tuples": self.tuples}, file)
+
+    # Loads a saved network; mmap_mode='r' maps the weight file read-only instead of reading it into memory
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        with open(os.path.splitext(path)[0] + ".json") as file:
+            tuples = json.load(file)["tuples"]
+        return cls(tuples, np.load(path, mmap_mode=mmap_mode))
+
+
+# Determines the best move for a bitboard with a trained network (greedy on points plus afterstate value)
+def find_best_move(board, network):
+    move = network.best_move(board)
+    return None if move is None else move[0]
+
+
+if __name__ == "__main__":
+    print("Training n-tuple network for 2048 AI solver...")
+    weights_path = "ntuple_weights.npy"
+    if os.path.exists(weights_path):
+        network = NTupleNetwork.load(weights_path, mmap_mode='r+')  # Continue training the saved weights in place
+    else:
+        network = NTupleNetwork()
+    network.train(100000, learning_rate=0.1, seed=None, path=weights_path)
+    print(f"Weights saved to {weights_path}")
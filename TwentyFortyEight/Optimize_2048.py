@@ -1,6 +1,6 @@
 #  Author: Kyle Tranfaglia
 #  Title: PynacleGames - Game04 - 2048
-#  Last updated:  02/20/25
+#  Last updated:  10/18/26
 #  Description: This program runs tests to optimize the weights for the AI evaluation parameters
 """ The original optimization program implements a straightforward grid search technique for tuning the heuristic
 weights used by the greedy AI solver for 2048. In this approach, the algorithm begins with a base set of weights and
@@ -10,52 +10,26 @@ the modified set. If any perturbation leads to an improvement in the average sco
 the new best configuration. This process is repeated for all weights, and the final optimized set is saved to a results
 file. While simple to implement, this method can be limited by its inability to escape local optima and by the fact
 that it adjusts only one parameter at a time. """
-import random
 import json
-from PyQt5.QtCore import Qt
-from TwentyFortyEight import (simulate_move, calculate_monotonicity, calculate_merge_potential, calculate_smoothness)
-
-
-# A simplified dummy 2048 game environment for AI evaluation
-class Dummy2048Game:
-    def __init__(self):
-        self.moves = 0
-        self.points = 0
-        self.board = [[0] * 4 for _ in range(4)]
-        self.add_random_tile()
-        self.add_random_tile()
-
-    # Moves tiles in the given direction and adds a random tile if the move is valid
-    def move_tiles(self, direction):
-        new_board = simulate_move(self.board, direction)
-        if new_board != self.board:
-            self.board = new_board
-            self.moves += 1
-            self.add_random_tile()
-            self.points += sum(sum(row) for row in self.board)
-
-    # Adds a new tile (either 2 or 4) in a random empty cell
-    def add_random_tile(self):
-        empty_cells = [(r, c) for r in range(4) for c in range(4) if self.board[r][c] == 0]
-        if empty_cells:
-            r, c = random.choice(empty_cells)
-            self.board[r][c] = 2 if random.random() < 0.9 else 4
-
-
-# Runs multiple games and returns an evaluation score
-def test_weights(weights, num_games=100):
+import random
+from Engine2048 import Game2048, backend_for_size
+from HeuristicTables2048 import evaluator_for_size
+
+
+# Runs multiple games (one per tile spawn seed, if given) on boards of the given size and returns an evaluation score
+def test_weights(weights, num_games=100, seeds=None, size=4):
     total_score = 0
     max_tiles_reached = []
 
     for game_index in range(num_games):
         print(f"Starting game {game_index + 1}/{num_games} with weights: {weights}")
-        game = Dummy2048Game()
+        game = Game2048(None if seeds is None else seeds[game_index], backend_for_size(size))
         move_count = 0
 
         while True:
-            best_move = find_best_move(game.board, weights)
-            if best_move:
-                game.move_tiles(best_move)
+            best_move = find_best_move(game.board, weights, size)
+            if best_move is not None:
+                game.move(best_move)
                 move_count += 1
                 if move_count > 10000:  # Prevent infinite loops
                     print("ERROR: AI is taking too long. Breaking loop.")
@@ -64,18 +38,19 @@ def test_weights(weights, num_games=100):
                 print(f"Game {game_index + 1} finished after {move_count} moves. Final Score: {game.points}")
                 break
 
-        max_tile = max(max(row) for row in game.board)
-        max_tiles_reached.append(max_tile)
+        max_tiles_reached.append(game.max_tile())
         total_score += game.points
 
     return total_score / num_games
 
 
 # Performs weight optimization using a simple grid search by perturbing each weight
-def optimize_weights_by_perturbation(base_weights, step=.05):
+def optimize_weights_by_perturbation(base_weights, step=.05, size=4):
     """Performs a simple grid search by perturbing each weight up and down."""
+    # Every perturbation plays the same games, so score differences come from the weights alone
+    seeds = [random.getrandbits(32) for _ in range(100)]
     best_weights = list(base_weights)
-    best_score = test_weights(base_weights)
+    best_score = test_weights(base_weights, seeds=seeds, size=size)
 
     print(f"Base weights: {base_weights}, Score: {best_score}")
 
@@ -84,7 +59,7 @@ def optimize_weights_by_perturbation(base_weights, step=.05):
             new_weights = list(base_weights)
             new_weights[i] += delta  # Modify one weight
 
-            score = test_weights(new_weights)
+            score = test_weights(new_weights, seeds=seeds, size=size)
             print(f"Testing {new_weights} -> Score: {score}")
 
             if score > best_score:  # If it's better, update
@@ -99,27 +74,19 @@ def optimize_weights_by_perturbation(base_weights, step=.05):
     print("Results saved to optimized_results.json")
 
 
-# Returns a list of possible moves based on the current board state
-def get_possible_moves(board):
-    moves = []
-    for move in [Qt.Key_Left, Qt.Key_Right, Qt.Key_Up, Qt.Key_Down]:
-        if simulate_move(board, move) != board:  # Check if move changes the board
-            moves.append(move)
-    return moves
-
-
-# Determines the best move based on the evaluation function
-def find_best_move(board, weights):
+# Determines the best move on a board of the given size based on the evaluation function
+def find_best_move(board, weights, size=4):
+    backend = backend_for_size(size)
     best_move = None
     best_score = float('-inf')
-    possible_moves = get_possible_moves(board)
+    possible_moves = backend.legal_moves(board)
 
     if not possible_moves:
         return None  # No moves available
 
     for move in possible_moves:
-        new_board = simulate_move(board, move)
-        score = evaluate_with_weights(new_board, weights)
+        new_board, _ = backend.execute_move(board, move)
+        score = evaluate_with_weights(new_board, weights, size)
         if score > best_score:
             best_score = score
             best_move = move
@@ -127,20 +94,11 @@ def find_best_move(board, weights):
     return best_move
 
 
-# Evaluates the given board state using weighted heuristics
-def evaluate_with_weights(board, weights):
-    empty_cells = sum(row.count(0) for row in board)
-    monotonicity = calculate_monotonicity(board)
-    merge_potential = calculate_merge_potential(board)
-    smoothness = calculate_smoothness(board)
-    max_tile = max(max(row) for row in board)
-    return (
-            weights[0] * empty_cells +
-            weights[1] * monotonicity +
-            weights[2] * merge_potential +
-            weights[3] * smoothness +
-            weights[4] * max_tile
-    )
+# Evaluates a board using the weighted heuristic function (tables are only rebuilt when the weights change)
+def evaluate_with_weights(board, weights, size=4):
+    evaluator = evaluator_for_size(size)
+    evaluator.set_weights(weights)
+    return evaluator.evaluate(board)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 #  Author: Kyle Tranfaglia
 #  Title: PynacleGames - Game04 - 2048
-#  Last updated:  03/01/25
+#  Last updated:  10/18/26
 #  Description: This program runs tests to optimize the weights for the AI evaluation parameters
 """ This program adopts a simulated annealing strategy to search for a better set of heuristic weights. Rather than
 adjusting one weight at a time, this approach perturbs all the weights simultaneously by adding a random change within
@@ -11,149 +11,149 @@ temperature (a control parameter) lowers over time. This mechanism allows the al
 the process, gradually converging to a more optimal solution as the temperature cools. The refined balance between
 exploration and exploitation, combined with the focus on average scores, offers a more robust search strategy, and the
 best-found configuration is saved for further use. """
+import os
 import random
+import argparse
 import json
 import math
-from PyQt5.QtCore import Qt
-from TwentyFortyEight import simulate_move, calculate_monotonicity, calculate_merge_potential, calculate_smoothness
-
-
-# Simplified 2048 game environment for AI evaluation
-class Dummy2048Game:
-    def __init__(self):
-        # Initialize a new dummy game with an empty board and two random tiles
-        self.moves = 0
-        self.points = 0
-        self.board = [[0] * 4 for _ in range(4)]
-        self.add_random_tile()
-        self.add_random_tile()
-
-    # Helper function that processes a row and returns both the new row and the merge score.
-    def slide_and_merge_with_score(self, row):
-        # Remove zeros (shift left)
-        new_row = [value for value in row if value != 0]
-        merge_score = 0
-        i = 0
-        while i < len(new_row) - 1:
-            if new_row[i] == new_row[i + 1]:
-                new_row[i] *= 2
-                merge_score += new_row[i]  # Add the merged value to the score.
-                del new_row[i + 1]
-                new_row.append(0)  # Maintain row length.
-            i += 1
-        # Pad with zeros if needed.
-        return new_row + [0] * (len(row) - len(new_row)), merge_score
-
-    # Modified move_tiles that uses merge-aware scoring.
-    def move_tiles(self, direction):
-        original_board = [row[:] for row in self.board]  # Copy board for comparison.
-        rotated = False
-        # Transform board for vertical moves.
-        if direction in (Qt.Key_Up, Qt.Key_Down):
-            self.board = [list(x) for x in zip(*self.board)]
-            rotated = True
-        # Reverse rows for right or down moves.
-        if direction in (Qt.Key_Right, Qt.Key_Down):
-            self.board = [list(reversed(row)) for row in self.board]
-
-        total_merge_score = 0
-        new_board = []
-        # Process each row using our helper.
-        for row in self.board:
-            merged_row, merge_score = self.slide_and_merge_with_score(row)
-            new_board.append(merged_row)
-            total_merge_score += merge_score
-
-        self.board = new_board
-
-        # Reverse earlier transformations.
-        if direction in (Qt.Key_Right, Qt.Key_Down):
-            self.board = [list(reversed(row)) for row in self.board]
-        if rotated:
-            self.board = [list(x) for x in zip(*self.board)]
-
-        # Only update if the board has changed.
-        if original_board != self.board:
-            self.moves += 1
-            self.points += total_merge_score  # Add only the merge scores.
-            self.add_random_tile()
-
-    # Adds a new tile (2 or 4) to a random empty cell on the board. 2 appears with 90% probability
-    def add_random_tile(self):
-        empty_cells = [(r, c) for r in range(4) for c in range(4) if self.board[r][c] == 0]
-        if empty_cells:
-            r, c = random.choice(empty_cells)
-            self.board[r][c] = 2 if random.random() < 0.9 else 4
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from Engine2048 import Game2048, backend_for_size
+from BatchSimulator2048 import play_games
+from HeuristicTables2048 import evaluator_for_size
 
 
-# Tests a set of weights by running multiple games and calculating the average score
-def test_weights(weights, num_games=100):
-    total_score = 0
-    for game_index in range(num_games):
-        print(f"Starting game {game_index + 1}/{num_games} with weights: {weights}")
-        game = Dummy2048Game()
-        move_count = 0
-        while True:
-            best_move = find_best_move(game.board, weights)
-            if best_move:
-                game.move_tiles(best_move)
-                move_count += 1
-                if move_count > 10000:  # Safety check to prevent infinite loops
-                    print("ERROR: AI is taking too long. Breaking loop.")
+# Plays one silent game with the given weights, tile spawn seed and board size and returns the final score
+def play_game(weights, seed, size=4):
+    game = Game2048(seed, backend_for_size(size))
+    move_count = 0
+    while True:
+        best_move = find_best_move(game.board, weights, size)
+        if best_move is None or move_count > 10000:  # Game over, or safety check to prevent infinite loops
+            break
+        game.move(best_move)
+        move_count += 1
+    return game.points
+
+
+# Plays a number of games with the given weights and returns the final score of every game. Passing the same tile
+# spawn seeds for two sets of weights plays both on identical games (common random numbers)
+def play_weight_games(weights, num_games, executor=None, batch=False, seeds=None, rng=random, size=4):
+    if seeds is None:
+        seeds = [rng.getrandbits(32) for _ in range(num_games)]  # Each game gets its own seed
+    if batch and size != 4:
+        raise ValueError("The batch simulator only plays 4x4 boards")
+    if batch:
+        # Play every game at once in the NumPy batch simulator
+        scores = play_games(weights, num_games, game_seeds=seeds).tolist()
+    elif executor is not None:
+        # Spread the games across the worker processes and only report the aggregate result
+        scores = list(executor.map(play_game, [weights] * num_games, seeds, [size] * num_games))
+    else:
+        scores = []
+        for game_index in range(num_games):
+            print(f"Starting game {game_index + 1}/{num_games} with weights: {weights}")
+            game = Game2048(seeds[game_index], backend_for_size(size))
+            move_count = 0
+            while True:
+                best_move = find_best_move(game.board, weights, size)
+                if best_move is not None:
+                    game.move(best_move)
+                    move_count += 1
+                    if move_count > 10000:  # Safety check to prevent infinite loops
+                        print("ERROR: AI is taking too long. Breaking loop.")
+                        break
+                else:
+                    print(f"Game {game_index + 1} finished after {move_count} moves. Final Score: {game.points}")
                     break
-            else:
-                print(f"Game {game_index + 1} finished after {move_count} moves. Final Score: {game.points}")
-                break
-        total_score += game.points
-    average_score = total_score / num_games
-    print(f"Average Score for weights {weights}: {average_score}")
-    with open("optimized_results_log_7.txt", "a") as log_file:
-        log_file.write(f"Average Score for weights {weights}: {average_score}\n")
+            scores.append(game.points)
+    return scores
+
+
+# Tests a set of weights by running multiple games and calculating the average score
+def test_weights(weights, num_games=100, executor=None, batch=False, seeds=None, size=4):
+    scores = play_weight_games(weights, num_games, executor, batch, seeds, size=size)
+    average_score = sum(scores) / num_games
+    report_average(weights, average_score)
     return average_score
 
 
-# Returns a list of possible moves for the current board state
-def get_possible_moves(board):
-    moves = []
-    for move in [Qt.Key_Left, Qt.Key_Right, Qt.Key_Up, Qt.Key_Down]:
-        if simulate_move(board, move) != board:  # Check if move would change the board
-            moves.append(move)
-    return moves
+# Prints the average score of a set of weights
+def report_average(weights, average_score, note=""):
+    print(f"Average Score for weights {weights}: {average_score}{note}")
+
+
+# Returns the mean and sample variance of a list of scores
+def score_statistics(scores):
+    mean = sum(scores) / len(scores)
+    variance = sum((score - mean) ** 2 for score in scores) / (len(scores) - 1) if len(scores) > 1 else 0.0
+    return mean, variance
 
 
-# Determines the best move based on the weighted evaluation function
-def find_best_move(board, weights):
+# Tests candidate weights against the current weights' scores with sequential sampling. Games are played in rounds
+# that double in size, and the candidate is rejected as soon as the upper confidence bound of its score difference
+# falls below the acceptance threshold, so only promising candidates are played to max_games. When seeds are given,
+# the candidate replays the current weights' games in order and the comparison uses the per-game score differences.
+# Returns the candidate's scores and whether it is accepted.
+def test_weights_sequential(weights, current_scores, threshold, min_games, max_games, rejection_z=1.5,
+                            acceptance_confidence=0.5, executor=None, batch=False, seeds=None, rng=random, size=4):
+    current_mean, current_variance = score_statistics(current_scores)
+    scores = []
+    round_size = min_games
+    while True:
+        round_games = min(round_size, max_games - len(scores))
+        round_seeds = None if seeds is None else seeds[len(scores):len(scores) + round_games]
+        scores += play_weight_games(weights, round_games, executor, batch, round_seeds, rng, size)
+        mean, variance = score_statistics(scores)
+        if seeds is None:
+            difference = mean - current_mean
+            standard_error = math.sqrt(variance / len(scores) + current_variance / len(current_scores))
+        else:
+            # Paired comparison: both sets of weights played the same games, so only the differences vary
+            difference, difference_variance = score_statistics(
+                [score - current for score, current in zip(scores, current_scores)])
+            standard_error = math.sqrt(difference_variance / len(scores))
+
+        # Reject early once the candidate is confidently below the threshold
+        if difference + rejection_z * standard_error < threshold:
+            accepted = False
+            break
+        if len(scores) >= max_games:
+            # Accept if the score difference is likely enough to exceed the threshold
+            if standard_error > 0:
+                z = (difference - threshold) / standard_error
+                accepted = 0.5 * (1 + math.erf(z / math.sqrt(2))) >= acceptance_confidence
+            else:
+                accepted = difference > threshold
+            break
+        round_size = len(scores)  # Double the sample for candidates that are still in contention
+
+    report_average(weights, mean, f" ({len(scores)} games)")
+    return scores, accepted
+
+
+# Determines the best move on a board of the given size based on the weighted evaluation function
+def find_best_move(board, weights, size=4):
+    backend = backend_for_size(size)
     best_move = None
     best_score = float('-inf')
-    possible_moves = get_possible_moves(board)
+    possible_moves = backend.legal_moves(board)
     if not possible_moves:
         return None  # No valid moves available
     for move in possible_moves:
-        new_board = simulate_move(board, move)
-        score = evaluate_with_weights(new_board, weights)
+        new_board, _ = backend.execute_move(board, move)
+        score = evaluate_with_weights(new_board, weights, size)
         if score > best_score:
             best_score = score
             best_move = move
     return best_move
 
 
-# Evaluates a board state using the weighted heuristic function
-def evaluate_with_weights(board, weights):
-    # Calculate various heuristics
-    empty_cells = sum(row.count(0) for row in board)
-    monotonicity = calculate_monotonicity(board)
-    merge_potential = calculate_merge_potential(board)
-    smoothness = calculate_smoothness(board)
-    max_tile = max(max(row) for row in board)
-
-    # Apply weights to each heuristic and return weighted sum
-    return (
-            weights[0] * empty_cells +  # Empty cells (space availability)
-            weights[1] * monotonicity +  # Monotonicity (ordered tiles)
-            weights[2] * merge_potential +  # Merge potential (adjacent same values)
-            weights[3] * smoothness +  # Smoothness (gradual value changes)
-            weights[4] * max_tile  # Maximum tile value
-    )
+# Evaluates a board using the weighted heuristic function (tables are only rebuilt when the weights change)
+def evaluate_with_weights(board, weights, size=4):
+    evaluator = evaluator_for_size(size)
+    evaluator.set_weights(weights)
+    return evaluator.evaluate(board)
 
 
 # Applies constraints to keep weights within specified bounds
@@ -161,58 +161,168 @@ def apply_constraints(weight, min_val=0.0, max_val=10.0):
     return max(min_val, min(max_val, weight))
 
 
+# Writes a JSON file atomically, so a crash mid-write never leaves a truncated file behind
+def write_json_atomic(path, data):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+# Converts a random.Random state into JSON-friendly lists and back
+def rng_state_to_json(state):
+    version, internal_state, gauss_next = state
+    return [version, list(internal_state), gauss_next]
+
+
+def rng_state_from_json(state):
+    version, internal_state, gauss_next = state
+    return version, tuple(internal_state), gauss_next
+
+
 # Optimization Algorithm: Simulated Annealing
 def optimize_weights_sa(initial_weights, num_iterations=500, num_games=30,
-                        initial_temp=1.0, cooling_rate=0.9, step_size=0.1):
+                        initial_temp=1.0, cooling_rate=0.9, step_size=0.1, workers=1, batch=False,
+                        adaptive=False, min_games=8, rejection_z=1.5, acceptance_confidence=0.5,
+                        common_seeds=True, seed=None, checkpoint_file="optimized_results_V2_checkpoint.json",
+                        checkpoint_interval=1, log_file="optimized_results_V2_log.jsonl", resume_state=None, size=4):
     """
     Optimizes weights using a simulated annealing approach.
 
     Parameters:
       initial_weights: List of starting weights.
       num_iterations: Number of iterations to run the annealing process.
-      num_games: Number of games to average over for each evaluation.
+      num_games: Number of games to average over for each evaluation (the maximum when adaptive).
       initial_temp: Starting temperature for annealing.
       cooling_rate: Factor by which temperature is reduced each iteration.
       step_size: Maximum change applied to each weight during a perturbation.
+      workers: Number of processes used to play each candidate's games (1 plays them in this process).
+      batch: Play each candidate's games together in the NumPy batch simulator instead (ignores workers).
+      adaptive: Evaluate candidates sequentially and reject clearly worse ones before num_games are played.
+      min_games: Games played in the first round of an adaptive evaluation.
+      rejection_z: Confidence bound (in standard errors) used to reject a candidate early.
+      acceptance_confidence: Probability that a candidate beats the acceptance threshold required to accept it.
+      common_seeds: Play every candidate on the same fixed set of tile spawn seeds so scores are compared game by game.
+      seed: Seed for the optimizer's random number generator (perturbations, acceptance and tile spawn seeds).
+      checkpoint_file: File that receives the full optimizer state (None disables checkpoints).
+      checkpoint_interval: Number of iterations between checkpoints.
+      log_file: File that receives one JSON line per iteration.
+      resume_state: Optimizer state loaded from a checkpoint (see resume_weights_sa).
+      size: Board size (cells per side) of the games, from 3 to 8 (the batch simulator only plays 4x4).
     """
-    current_weights = list(initial_weights)
-    best_weights = list(initial_weights)
-    current_score = test_weights(current_weights, num_games=num_games)
-    best_score = current_score
-    current_temp = initial_temp
-
-    print(f"Starting simulated annealing with initial weights: {initial_weights}, score: {current_score}")
-
-    for iteration in range(num_iterations):
-        # Create a new candidate by perturbing each weight randomly with constraints
-        candidate_weights = []
-        for w in current_weights:
-            # Apply random perturbation
-            new_w = w + random.uniform(-step_size, step_size)
-            # Apply constraint to keep weight positive
-            new_w = apply_constraints(new_w)
-            candidate_weights.append(new_w)
-
-        candidate_score = test_weights(candidate_weights, num_games=num_games)
-        score_diff = candidate_score - current_score
-
-        # Simulated annealing acceptance criterion:
-        # 1. Always accept better solutions
-        # 2. Sometimes accept worse solutions based on temperature
-        if score_diff > 0 or random.random() < math.exp(score_diff / current_temp):
-            current_weights = candidate_weights
-            current_score = candidate_score
-            # Update best weights and score if current solution is the best so far
-            if candidate_score > best_score:
-                best_weights = candidate_weights
-                best_score = candidate_score
-
-        print(f"Iteration {iteration + 1}/{num_iterations} -- Current Score: {current_score}, Best Score: {best_score}")
-        current_temp *= cooling_rate  # Reduce temperature according to cooling schedule
+    settings = {
+        "initial_weights": list(initial_weights), "num_iterations": num_iterations, "num_games": num_games,
+        "initial_temp": initial_temp, "cooling_rate": cooling_rate, "step_size": step_size, "adaptive": adaptive,
+        "min_games": min_games, "rejection_z": rejection_z, "acceptance_confidence": acceptance_confidence,
+        "common_seeds": common_seeds, "seed": seed, "log_file": log_file, "size": size,
+    }
+    rng = random.Random(seed)
+
+    # Writes the per-iteration record to the JSON lines log and returns the size of the log afterwards
+    def log_iteration(record):
+        with open(log_file, "a") as file:
+            file.write(json.dumps(record) + "\n")
+            return file.tell()
+
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 and not batch else nullcontext() as executor:
+        if resume_state is None:
+            # With common random numbers, score differences come from the weights and not from luckier tile spawns
+            seeds = [rng.getrandbits(32) for _ in range(num_games)] if common_seeds else None
+            current_weights = list(initial_weights)
+            best_weights = list(initial_weights)
+            current_scores = play_weight_games(current_weights, num_games, executor, batch, seeds, rng, size)
+            current_score = sum(current_scores) / num_games
+            report_average(current_weights, current_score)
+            best_score = current_score
+            current_temp = initial_temp
+            games_played = num_games
+            start_iteration = 0
+            log_size = log_iteration({"iteration": 0, "candidate_weights": current_weights,
+                                      "candidate_score": current_score, "candidate_games": num_games,
+                                      "accepted": True, "current_weights": current_weights,
+                                      "current_score": current_score, "best_weights": best_weights,
+                                      "best_score": best_score, "temperature": current_temp,
+                                      "games_played": games_played})
+            print(f"Starting simulated annealing with initial weights: {initial_weights}, score: {current_score}")
+        else:
+            seeds = resume_state["seeds"]
+            current_weights = resume_state["current_weights"]
+            current_scores = resume_state["current_scores"]
+            current_score = resume_state["current_score"]
+            best_weights = resume_state["best_weights"]
+            best_score = resume_state["best_score"]
+            current_temp = resume_state["temperature"]
+            games_played = resume_state["games_played"]
+            start_iteration = resume_state["iteration"]
+            rng.setstate(rng_state_from_json(resume_state["rng_state"]))
+            # Drop log lines written after the checkpoint (the iterations they describe are played again)
+            log_size = resume_state.get("log_size")
+            if log_size is not None and os.path.exists(log_file) and os.path.getsize(log_file) > log_size:
+                with open(log_file, "r+") as file:
+                    file.truncate(log_size)
+            print(f"Resuming simulated annealing at iteration {start_iteration + 1}/{num_iterations} with weights: "
+                  f"{current_weights}, score: {current_score}")
+
+        for iteration in range(start_iteration, num_iterations):
+            # Create a new candidate by perturbing each weight randomly with constraints
+            candidate_weights = []
+            for w in current_weights:
+                # Apply random perturbation
+                new_w = w + rng.uniform(-step_size, step_size)
+                # Apply constraint to keep weight positive
+                new_w = apply_constraints(new_w)
+                candidate_weights.append(new_w)
+
+            # Simulated annealing acceptance criterion:
+            # 1. Always accept better solutions
+            # 2. Sometimes accept worse solutions based on temperature
+            # Accepting when random() < exp(score_diff / temp) is the same as score_diff > temp * ln(random())
+            threshold = current_temp * math.log(1.0 - rng.random())
+            if adaptive:
+                candidate_scores, accepted = test_weights_sequential(
+                    candidate_weights, current_scores, threshold, min_games, num_games, rejection_z,
+                    acceptance_confidence, executor, batch, seeds, rng, size)
+                candidate_score = sum(candidate_scores) / len(candidate_scores)
+            else:
+                candidate_scores = play_weight_games(candidate_weights, num_games, executor, batch, seeds, rng, size)
+                candidate_score = sum(candidate_scores) / num_games
+                report_average(candidate_weights, candidate_score)
+                accepted = candidate_score - current_score > threshold
+            games_played += len(candidate_scores)
+
+            if accepted:
+                current_weights = candidate_weights
+                current_scores = candidate_scores
+                current_score = candidate_score
+                # Update best weights and score if current solution is the best so far
+                if candidate_score > best_score:
+                    best_weights = candidate_weights
+                    best_score = candidate_score
+
+            print(f"Iteration {iteration + 1}/{num_iterations} -- Current Score: {current_score}, "
+                  f"Best Score: {best_score}, Games Played: {games_played}")
+            log_size = log_iteration({"iteration": iteration + 1, "candidate_weights": candidate_weights,
+                                      "candidate_score": candidate_score, "candidate_games": len(candidate_scores),
+                                      "accepted": accepted, "threshold": threshold,
+                                      "current_weights": current_weights, "current_score": current_score,
+                                      "best_weights": best_weights, "best_score": best_score,
+                                      "temperature": current_temp, "games_played": games_played})
+            current_temp *= cooling_rate  # Reduce temperature according to cooling schedule
+
+            # Save everything needed to continue from the next iteration
+            if checkpoint_file and (iteration + 1) % checkpoint_interval == 0:
+                write_json_atomic(checkpoint_file, {"settings": settings, "state": {
+                    "iteration": iteration + 1, "current_weights": current_weights, "current_scores": current_scores,
+                    "current_score": current_score, "best_weights": best_weights, "best_score": best_score,
+                    "temperature": current_temp, "games_played": games_played, "seeds": seeds,
+                    "rng_state": rng_state_to_json(rng.getstate()), "log_size": log_size}})
+
+    if checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)  # The run is complete, so there is nothing left to resume
 
     print(f"Optimized weights: {best_weights}, Best Average Score: {best_score}")
-    with open("optimized_results_log_7.txt", "a") as log_file:  # Save results to text file
-        log_file.write(f"Optimized weights: {best_weights}, Best Average Score: {best_score}\n")
     # Save optimization results to a JSON file
     with open("optimized_results_V2.json", "a") as file:
         file.write(json.dumps({"optimized_weights": best_weights, "best_score": best_score}) + "\n")
@@ -220,8 +330,34 @@ def optimize_weights_sa(initial_weights, num_iterations=500, num_games=30,
     return best_weights, best_score
 
 
+# Continues an interrupted simulated annealing run from its last checkpoint
+def resume_weights_sa(checkpoint_file="optimized_results_V2_checkpoint.json", workers=1, batch=False,
+                      checkpoint_interval=1):
+    with open(checkpoint_file) as file:
+        checkpoint = json.load(file)
+    return optimize_weights_sa(**checkpoint["settings"], workers=workers, batch=batch,
+                               checkpoint_file=checkpoint_file, checkpoint_interval=checkpoint_interval,
+                               resume_state=checkpoint["state"])
+
+
 if __name__ == "__main__":
-    print("Running simulated annealing optimization for 2048 AI solver...")
-    initial_weights = [6.416473515102024, 3.0854501225507858,
-                       3.716706248156772, 2.72394479230781, 0.0]  # Starting weights
-    optimize_weights_sa(initial_weights)
+    parser = argparse.ArgumentParser(description="Optimize the 2048 AI weights with simulated annealing.")
+    parser.add_argument("--resume", action="store_true", help="continue the run saved in the checkpoint file")
+    parser.add_argument("--checkpoint", default="optimized_results_V2_checkpoint.json", help="checkpoint file")
+    parser.add_argument("--workers", type=int, default=1, help="processes that play each candidate's games")
+    parser.add_argument("--batch", action="store_true", help="play games in the NumPy batch simulator")
+    parser.add_argument("--adaptive", action="store_true", help="reject clearly worse candidates early")
+    args = parser.parse_args()
+
+    if args.resume:
+        print("Resuming simulated annealing optimization for 2048 AI solver...")
+        resume_weights_sa(args.checkpoint, workers=args.workers, batch=args.batch)
+    else:
+        if os.path.exists(args.checkpoint):
+            print(f"Starting a new run; the checkpoint in {args.checkpoint} will be overwritten (use --resume to "
+                  "continue it)")
+        print("Running simulated annealing optimization for 2048 AI solver...")
+        initial_weights = [6.416473515102024, 3.0854501225507858,
+                           3.716706248156772, 2.72394479230781, 0.0]  # Starting weights
+        optimize_weights_sa(initial_weights, workers=args.workers, batch=args.batch, adaptive=args.adaptive,
+                            checkpoint_file=args.checkpoint)
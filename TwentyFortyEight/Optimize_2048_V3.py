@@ -0,0 +1,141 @@
+#  Author: Kyle Tranfaglia
+#  Title: PynacleGames - Game04 - 2048
+#  Last updated:  10/18/26
+#  Description: This program runs tests to optimize the weights for the AI evaluation parameters
+""" This program replaces the single annealing chain with a population-based search, the Covariance Matrix Adaptation
+Evolution Strategy (CMA-ES). Each generation samples a whole population of weight vectors from a multivariate normal
+distribution centered on the current mean. Every game of every candidate in the generation is played concurrently across
+a pool of worker processes, so a generation costs about as much wall time as a single candidate did before. The best
+half of the population, ranked by average score, moves the mean towards better weights, while the step size and the
+covariance matrix adapt to the shape of the score landscape, so correlated weights are tuned together instead of one at
+a time. Candidates are kept inside the same [0, 10] bounds that apply_constraints enforces for simulated annealing,
+statistics for every generation are printed and logged as JSON lines, and the best configuration is saved. """
+import os
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from Optimize_2048_V2 import play_game, apply_constraints
+
+
+# Plays every game of every candidate in a generation across the worker processes and returns the average scores.
+# All candidates play the same tile spawn seeds, so they are ranked on identical games
+def evaluate_population(population, num_games, executor, rng, size=4):
+    weights = [list(candidate) for candidate in population for _ in range(num_games)]
+    seeds = rng.integers(0, 2 ** 32, size=num_games).tolist() * len(population)
+    scores = list(executor.map(play_game, weights, seeds, [size] * len(weights)))
+    return [sum(scores[i * num_games:(i + 1) * num_games]) / num_games for i in range(len(population))]
+
+
+# Optimization Algorithm: CMA-ES
+def optimize_weights_cmaes(initial_weights, num_generations=100, num_games=30, population_size=None,
+                           initial_sigma=0.5, workers=None, seed=None, log_file="optimized_results_V3_log.jsonl",
+                           size=4):
+    """
+    Optimizes weights using the Covariance Matrix Adaptation Evolution Strategy.
+
+    Parameters:
+      initial_weights: List of starting weights (mean of the first generation).
+      num_generations: Number of generations to run.
+      num_games: Number of games to average over for each candidate.
+      population_size: Candidates per generation (defaults to 4 + 3 * ln(number of weights)).
+      initial_sigma: Starting step size of the search distribution.
+      workers: Number of processes used to play games (defaults to all cores).
+      seed: Seed for sampling candidates and game seeds.
+      log_file: File that receives one JSON line of statistics per generation.
+      size: Board size (cells per side) of the games, from 3 to 8.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Strategy parameters (standard CMA-ES defaults)
+    n = len(initial_weights)
+    lam = population_size or 4 + int(3 * math.log(n))
+    mu = lam // 2
+    recombination_weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+    recombination_weights /= recombination_weights.sum()
+    mueff = 1 / np.sum(recombination_weights ** 2)
+    cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+    cs = (mueff + 2) / (n + mueff + 5)
+    c1 = 2 / ((n + 1.3) ** 2 + mueff)
+    cmu = min(1 - c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff))
+    damps = 1 + 2 * max(0, math.sqrt((mueff - 1) / (n + 1)) - 1) + cs
+    chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))  # Expected length of a standard normal vector
+
+    # Dynamic state of the search distribution
+    mean = np.array([apply_constraints(w) for w in initial_weights], dtype=float)
+    sigma = initial_sigma
+    covariance = np.eye(n)
+    path_c = np.zeros(n)
+    path_s = np.zeros(n)
+    best_weights = mean.tolist()
+    best_score = float('-inf')
+
+    print(f"Starting CMA-ES with initial weights: {mean.tolist()}, population size: {lam}")
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for generation in range(num_generations):
+            # Sample the population and keep every candidate inside the weight bounds
+            eigenvalues, basis = np.linalg.eigh(covariance)
+            scales = np.sqrt(np.maximum(eigenvalues, 1e-20))
+            samples = rng.standard_normal((lam, n))
+            population = mean + sigma * (samples * scales) @ basis.T
+            population = np.vectorize(apply_constraints)(population)
+
+            scores = evaluate_population(population.tolist(), num_games, executor, rng, size)
+
+            # Rank candidates by average score (highest first) and move the mean towards the best half
+            order = np.argsort(scores)[::-1]
+            elite = population[order[:mu]]
+            old_mean = mean
+            mean = recombination_weights @ elite
+            steps = (elite - old_mean) / sigma
+
+            # Update the evolution paths
+            inverse_sqrt = basis @ np.diag(1 / scales) @ basis.T
+            path_s = (1 - cs) * path_s + math.sqrt(cs * (2 - cs) * mueff) * inverse_sqrt @ (mean - old_mean) / sigma
+            stalled = (np.linalg.norm(path_s) / math.sqrt(1 - (1 - cs) ** (2 * (generation + 1))) / chi_n
+                       >= 1.4 + 2 / (n + 1))
+            path_c = ((1 - cc) * path_c +
+                      (0 if stalled else math.sqrt(cc * (2 - cc) * mueff)) * (mean - old_mean) / sigma)
+
+            # Adapt the covariance matrix (rank-one and rank-mu updates) and the step size
+            rank_one = np.outer(path_c, path_c) + (cc * (2 - cc) * covariance if stalled else 0)
+            rank_mu = (steps.T * recombination_weights) @ steps
+            covariance = (1 - c1 - cmu) * covariance + c1 * rank_one + cmu * rank_mu
+            covariance = np.triu(covariance) + np.triu(covariance, 1).T  # Keep the matrix symmetric
+            sigma *= math.exp((cs / damps) * (np.linalg.norm(path_s) / chi_n - 1))
+
+            # Track the best candidate found so far
+            if scores[order[0]] > best_score:
+                best_score = scores[order[0]]
+                best_weights = population[order[0]].tolist()
+
+            stats = {
+                "generation": generation + 1,
+                "best_score": scores[order[0]],
+                "mean_score": float(np.mean(scores)),
+                "std_score": float(np.std(scores)),
+                "worst_score": scores[order[-1]],
+                "sigma": sigma,
+                "mean_weights": mean.tolist(),
+                "best_weights": population[order[0]].tolist(),
+                "best_score_overall": best_score,
+            }
+            print(f"Generation {generation + 1}/{num_generations} -- Best: {stats['best_score']:.1f}, "
+                  f"Mean: {stats['mean_score']:.1f}, Std: {stats['std_score']:.1f}, Sigma: {sigma:.4f}, "
+                  f"Best Overall: {best_score:.1f}")
+            with open(log_file, "a") as file:
+                file.write(json.dumps(stats) + "\n")
+
+    print(f"Optimized weights: {best_weights}, Best Average Score: {best_score}")
+    with open("optimized_results_V3.json", "a") as file:
+        file.write(json.dumps({"optimized_weights": best_weights, "best_score": best_score}) + "\n")
+    print("Results saved to optimized_results_V3.json")
+    return best_weights, best_score
+
+
+if __name__ == "__main__":
+    print("Running CMA-ES optimization for 2048 AI solver...")
+    initial_weights = [6.416473515102024, 3.0854501225507858,
+                       3.716706248156772, 2.72394479230781, 0.0]  # Starting weights
+    optimize_weights_cmaes(initial_weights, population_size=16)
@@ -1,41 +1,149 @@
 #  Author: Kyle Tranfaglia
 #  Title: PynacleGames - Game04 - 2048
-#  Last updated:  03/01/25
+#  Last updated:  10/18/26
 #  Description: This program plots the points scored by the AI in respect to the move
-import csv
+""" Long AI sessions record millions of moves, far more points than the saved image has pixels. The move history is
+therefore read in chunks of rows with NumPy and reduced on the fly: the moves are split into one bucket per pixel column
+of the figure, and only the lowest and highest score of each bucket (at the moves where they occur) are kept. Plotting
+those two points per bucket draws the same picture as plotting every move, while memory stays proportional to the
+width of the figure instead of the length of the log. Any number of move histories, given as files or directories of
+CSVs, can be overlaid on one chart, one file at a time. """
+import os
+import glob
+import argparse
 import datetime
+from itertools import islice
+import numpy as np
 import matplotlib.pyplot as plt
 
-# Initialize variables
-moves = []
-scores = []
+CHUNK_ROWS = 1000000  # Rows parsed at a time
+FIGURE_SIZE = (8, 5)
+DPI = 300
 
-# Generate timestamp-based filename
-timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-filename = f"2048_progress_{timestamp}.png"
 
-# Read the CSV file
-with open("moves.csv", mode='r') as file:
-    reader = csv.reader(file)
-    next(reader)  # Skip the header
+# Counts the data rows of a CSV file (every line after the header) without parsing them
+def count_rows(path):
+    lines = 0
+    last_byte = b"\n"
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last_byte = block[-1:]
+    if lines and last_byte != b"\n":
+        lines += 1  # The last line has no newline
+    return max(lines - 1, 0)
 
-    for row in reader:
-        move, score = int(row[0]), int(row[1])  # Convert data to integers
-        moves.append(move)
-        scores.append(score)
 
-# Plot the data
-plt.figure(figsize=(8, 5))
-plt.plot(moves, scores, marker=",", linestyle="-", color="b", label="Score Progression")
+# Yields the move numbers and scores of a move history CSV as NumPy arrays of up to chunk_rows rows
+def read_move_chunks(path, chunk_rows=CHUNK_ROWS):
+    with open(path, "r") as file:
+        next(file, None)  # Skip the header
+        while True:
+            lines = list(islice(file, chunk_rows))
+            if not lines:
+                break
+            data = np.loadtxt(lines, delimiter=",", dtype=np.int64, ndmin=2)
+            yield data[:, 0], data[:, 1]
 
-# Labels and Title
-plt.xlabel("Move Number")
-plt.ylabel("Score")
-plt.title("2048 AI Score Progression")
-plt.legend()
-plt.grid(True)
 
-# Save the figure and show the plot
-plt.savefig("Plots/" + filename, format="png", dpi=300, bbox_inches="tight")
-plt.show()
+# Reads a move history and keeps only the minimum and maximum score of each of the given number of buckets
+def load_downsampled(path, buckets, chunk_rows=CHUNK_ROWS):
+    total_rows = count_rows(path)
+    if total_rows <= 2 * buckets:
+        # Small enough to plot every move
+        chunks = list(read_move_chunks(path, chunk_rows))
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks])
 
+    # Lowest and highest score of every bucket and the move numbers where they occur
+    min_scores = np.full(buckets, np.iinfo(np.int64).max)
+    min_moves = np.zeros(buckets, dtype=np.int64)
+    max_scores = np.full(buckets, np.iinfo(np.int64).min)
+    max_moves = np.zeros(buckets, dtype=np.int64)
+
+    start_row = 0
+    for moves, scores in read_move_chunks(path, chunk_rows):
+        rows = np.arange(start_row, start_row + len(moves))
+        start_row += len(moves)
+        bucket_ids = rows * buckets // total_rows  # Buckets are contiguous runs of rows
+
+        # Start of every bucket's run within this chunk, and its minimum and maximum
+        starts = np.flatnonzero(np.r_[True, bucket_ids[1:] != bucket_ids[:-1]])
+        ids = bucket_ids[starts]
+        chunk_min = np.minimum.reduceat(scores, starts)
+        chunk_max = np.maximum.reduceat(scores, starts)
+
+        # Move number of the first row of each run that reaches the minimum (or maximum)
+        run_of_row = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(moves)]))
+        first_min = np.flatnonzero(scores == chunk_min[run_of_row])
+        first_max = np.flatnonzero(scores == chunk_max[run_of_row])
+        chunk_min_moves = moves[first_min[np.unique(run_of_row[first_min], return_index=True)[1]]]
+        chunk_max_moves = moves[first_max[np.unique(run_of_row[first_max], return_index=True)[1]]]
+
+        # Merge with buckets that started in an earlier chunk (earlier moves win ties)
+        lower = chunk_min < min_scores[ids]
+        min_scores[ids[lower]] = chunk_min[lower]
+        min_moves[ids[lower]] = chunk_min_moves[lower]
+        higher = chunk_max > max_scores[ids]
+        max_scores[ids[higher]] = chunk_max[higher]
+        max_moves[ids[higher]] = chunk_max_moves[higher]
+
+    # Two points per bucket, in the order the moves happened
+    min_first = min_moves <= max_moves
+    moves = np.column_stack([np.where(min_first, min_moves, max_moves), np.where(min_first, max_moves, min_moves)])
+    scores = np.column_stack([np.where(min_first, min_scores, max_scores),
+                              np.where(min_first, max_scores, min_scores)])
+    return moves.reshape(-1), scores.reshape(-1)
+
+
+# Expands files and directories into a list of move history CSV files
+def find_move_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.csv"))))
+        else:
+            files.append(path)
+    return files
+
+
+# Plots one or more move histories on one chart and saves it to the Plots folder
+def plot_move_histories(paths, output=None, dpi=DPI, show=True):
+    files = find_move_files(paths)
+    buckets = int(FIGURE_SIZE[0] * dpi)  # One bucket per pixel column of the saved figure
+
+    plt.figure(figsize=FIGURE_SIZE)
+    for path in files:
+        moves, scores = load_downsampled(path, buckets)
+        label = "Score Progression" if len(files) == 1 else os.path.splitext(os.path.basename(path))[0]
+        plt.plot(moves, scores, marker=",", linestyle="-", color="b" if len(files) == 1 else None, label=label,
+                 linewidth=None if len(files) == 1 else 0.75)
+
+    # Labels and Title
+    plt.xlabel("Move Number")
+    plt.ylabel("Score")
+    plt.title("2048 AI Score Progression")
+    plt.legend(fontsize="small" if len(files) > 5 else None)
+    plt.grid(True)
+
+    # Generate timestamp-based filename
+    if output is None:
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        output = "Plots/" + f"2048_progress_{timestamp}.png"
+
+    # Save the figure and show the plot
+    plt.savefig(output, format="png", dpi=dpi, bbox_inches="tight")
+    if show:
+        plt.show()
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plot the score progression of 2048 move histories.")
+    parser.add_argument("paths", nargs="*", default=["moves.csv"], help="move history CSV files or directories of them")
+    parser.add_argument("--output", help="image file to save (defaults to a timestamped file in Plots)")
+    parser.add_argument("--dpi", type=int, default=DPI, help="resolution of the saved image")
+    parser.add_argument("--no-show", action="store_true", help="save the image without opening a window")
+    args = parser.parse_args()
+    plot_move_histories(args.paths, args.output, args.dpi, not args.no_show)
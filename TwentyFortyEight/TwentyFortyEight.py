@@ -1,24 +1,33 @@
 #  Author: Kyle Tranfaglia
 #  Title: PynacleGames - Game04 - 2048
-#  Last updated:  03/20/25
+#  Last updated:  10/18/26
 #  Description: This program uses PyQt5 packages to build the game 2048
 import sys
 import os
-import random
-import copy
-import csv
 from datetime import datetime
 from PyQt5.QtWidgets import QWidget, QApplication, QPushButton, QVBoxLayout, QDialog, QLabel
-from PyQt5.QtGui import QPainter, QFont, QColor, QBrush, QPen
-from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QPainter, QFont, QColor, QBrush, QPen, QPixmap
+from PyQt5.QtCore import Qt, QRect, QObject, QThread, QTimer, QElapsedTimer, pyqtSignal, pyqtSlot
+from Bitboard2048 import LEFT, RIGHT, UP, DOWN
+from Engine2048 import Game2048, EVALUATION_WEIGHTS, backend_for_size
+from Expectimax2048 import ExpectimaxSearch, ParallelExpectimaxSearch
+from HeuristicTables2048 import HeuristicEvaluator
+from NTuple2048 import NTupleNetwork
+from MoveRecorder2048 import MoveRecorder
+from HighScoreStore2048 import HighScoreStore
 
 # Set game specifications: window size, cell/grid size, cell count, and grid starting location
-CELL_COUNT = 4
-CELL_SIZE = 144
+CELL_COUNT = 4  # Cells per side of the board (3 to 8)
+TILE_SIZE = 144  # Size of a tile on the 4x4 board (the corner radius and font are scaled from it on other sizes)
 CELL_PADDING = 16
+CELL_SIZE = 4 * (TILE_SIZE + CELL_PADDING) // CELL_COUNT - CELL_PADDING  # Keeps the grid the same size on any board
 CORNER_RADIUS = 16
 W_WIDTH = 1024
 W_HEIGHT = 768
+AI_MOVE_DELAY = 50  # Minimum time (ms) between AI moves so the solver can be watched
+NTUPLE_WEIGHTS_FILE = "ntuple_weights.npy"  # Trained n-tuple network used by the solver when present (see NTuple2048)
+MOVE_HISTORY_FILE = "moves.bin"  # Binary move recording appended to when move histories are saved
+SOLVER_PROCESSES = 1  # Above 1, the solver searches the root moves in this many worker processes and looks deeper
 
 # Calculate grid width and height
 grid_width = CELL_COUNT * (CELL_SIZE + CELL_PADDING) - CELL_PADDING
@@ -30,6 +39,10 @@ GRID_ORIGINY = (W_HEIGHT - grid_height) // 2
 
 border_color = QColor(30, 30, 30)  # Border color for grid elements
 
+# Map movement keys (arrow keys and WASD) to move directions
+KEY_TO_DIRECTION = {Qt.Key_Left: LEFT, Qt.Key_A: LEFT, Qt.Key_Right: RIGHT, Qt.Key_D: RIGHT,
+                    Qt.Key_Up: UP, Qt.Key_W: UP, Qt.Key_Down: DOWN, Qt.Key_S: DOWN}
+
 # Define colors for tiles based on their values
 tile_colors = {
     0: QColor(50, 50, 50),  # Dark gray (empty tiles)
@@ -56,131 +69,71 @@ def get_text_color(value):
     return QColor(255, 255, 255)  # White for all others
 
 
-#  Simulates a move on a given board without modifying the actual game state
-def simulate_move(board, direction):
-    temp_board = copy.deepcopy(board)  # Create a deep copy of the board to avoid modifying the original
-
-    # Slides and merges a single row or column properly
-    def slide_and_merge(row):
-        new_row = [value for value in row if value != 0]  # Remove zeros (shift left)
-        merged = []
-        i = 0
-        while i < len(new_row):
-            if i < len(new_row) - 1 and new_row[i] == new_row[i + 1] and i not in merged:
-                new_row[i] *= 2  # Merge tiles
-                new_row.pop(i + 1)  # Remove merged tile
-                merged.append(i)  # Mark as merged
-            i += 1
-        return new_row + [0] * (len(row) - len(new_row))  # Pad with zeros
-
-    # Apply move based on direction
-    if direction == Qt.Key_Left:
-        for r in range(len(temp_board)):
-            temp_board[r] = slide_and_merge(temp_board[r])
-
-    elif direction == Qt.Key_Right:
-        for r in range(len(temp_board)):
-            temp_board[r] = slide_and_merge(temp_board[r][::-1])[::-1]  # Reverse, merge, then reverse back
-
-    elif direction == Qt.Key_Up:
-        for c in range(len(temp_board[0])):
-            column = [temp_board[r][c] for r in range(len(temp_board))]
-            new_column = slide_and_merge(column)
-            for r in range(len(temp_board)):
-                temp_board[r][c] = new_column[r]
-
-    elif direction == Qt.Key_Down:
-        for c in range(len(temp_board[0])):
-            column = [temp_board[r][c] for r in range(len(temp_board))]
-            new_column = slide_and_merge(column[::-1])[::-1]
-            for r in range(len(temp_board)):
-                temp_board[r][c] = new_column[r]
-
-    return temp_board
-
-
-#  Determines possible moves from the current board state
-def get_possible_moves(board):
-    moves = []
-    for move in [Qt.Key_Left, Qt.Key_Right, Qt.Key_Up, Qt.Key_Down]:
-        temp_board = copy.deepcopy(board)
-        if simulate_move(temp_board, move):  # If board state changes, move is possible
-            moves.append(move)
-    return moves
-
-
-#  Evaluates the monotonicity of the board (favoring tiles that decrease in order)
-def calculate_monotonicity(board):
-    score = 0
-    for row in board:  # Check row-wise monotonicity
-        for i in range(3):
-            if row[i] >= row[i + 1]:
-                score += row[i]
-            else:
-                score -= row[i + 1]  # Penalize disorder
-    for col in range(4):  # Check column-wise monotonicity
-        for i in range(3):
-            if board[i][col] >= board[i + 1][col]:
-                score += board[i][col]
-            else:
-                score -= board[i + 1][col]  # Penalize disorder
-    return score
-
-
-#  Evaluates the board based on potential merges
-def calculate_merge_potential(board):
-    score = 0
-    for row in range(4):
-        for col in range(3):  # Encourage merging
-            if board[row][col] == board[row][col + 1]:
-                score += board[row][col] * 2
-            if board[col][row] == board[col + 1][row]:
-                score += board[col][row] * 2
-    return score
-
-
-#  Evaluates the smoothness of the board (penalizing large jumps in tile values)
-def calculate_smoothness(board):
-    score = 0
-    for row in range(4):  # Row-wise smoothness check
-        for col in range(3):
-            score -= abs(board[row][col] - board[row][col + 1])
-    for col in range(4):  # Column-wise smoothness check
-        for row in range(3):
-            score -= abs(board[row][col] - board[row + 1][col])
-    return score
-
-
-#  Evaluates the overall board state using a weighted heuristic function
-def evaluate(board):
-    empty_cells = sum(row.count(0) for row in board)
-    monotonicity = calculate_monotonicity(board)
-    merge_potential = calculate_merge_potential(board)
-    smoothness = calculate_smoothness(board)
-    # max_tile = max(max(row) for row in board)
-    weights = [6.4, 3.1, 3.7, 2.7]
-
-    return ((weights[0] * empty_cells) + (weights[1] * monotonicity) +
-            (weights[2] * merge_potential) + (weights[3] * smoothness))
-
-
-#  Finds the best move based on heuristic evaluation
-def find_best_move(board):
-    best_move = None
-    best_score = float('-inf')
+# Pre-renders one tile (rounded rectangle and value) into a pixmap of the given size for the given pixel ratio
+def render_tile(value, size, pixel_ratio=1.0):
+    pixmap = QPixmap(round(size * pixel_ratio), round(size * pixel_ratio))
+    pixmap.setDevicePixelRatio(pixel_ratio)
+    pixmap.fill(Qt.transparent)  # Keep the window background visible around the rounded corners
+
+    qp = QPainter(pixmap)
+    with qp:
+        qp.setBrush(QBrush(tile_colors.get(value, QColor(50, 50, 50))))
+        qp.setPen(Qt.NoPen)  # Remove border outline
+        qp.drawRoundedRect(QRect(0, 0, size, size), CORNER_RADIUS * size / TILE_SIZE, CORNER_RADIUS * size / TILE_SIZE)
+
+        # Draw tile value if it's not empty (0)
+        if value:
+            qp.setPen(get_text_color(value))
+            qp.setFont(QFont('Montserrat Bold', max(1, 32 * size // TILE_SIZE), QFont.Bold))
+            text = str(value)
+
+            # Calculate text width and height for proper centering
+            text_width = qp.fontMetrics().width(text)
+            text_height = qp.fontMetrics().height()
+
+            # Draw the tile value centered in the tile
+            qp.drawText((size - text_width) // 2, (size + text_height - CELL_PADDING * size // TILE_SIZE) // 2, text)
+    return pixmap
+
 
-    for move in get_possible_moves(board):
-        new_board = simulate_move(board, move)
+# Board backend for the board size (the 64-bit bitboard on 4x4), None when the solver can use the bitboard functions
+board_backend = backend_for_size(CELL_COUNT)
+solver_backend = None if CELL_COUNT == 4 else board_backend
+
+# Table-based version of evaluate for packed bitboards
+evaluator = HeuristicEvaluator(EVALUATION_WEIGHTS, solver_backend)
+
+# A trained n-tuple network (4x4 only) replaces the heuristic when its weights are available. It predicts future points,
+# so move scores are added to its values
+if CELL_COUNT == 4 and os.path.exists(NTUPLE_WEIGHTS_FILE):
+    network = NTupleNetwork.load(NTUPLE_WEIGHTS_FILE, mmap_mode='r')
+    solver_evaluator, solver_move_scores = network.evaluate, True
+else:
+    solver_evaluator, solver_move_scores = evaluator.evaluate, False
+
+# Expectimax solver used by the AI (looks up to three moves ahead, or four with worker processes, in 100 ms per move)
+if SOLVER_PROCESSES > 1:
+    solver = ParallelExpectimaxSearch(solver_evaluator, max_depth=4, min_probability=0.0001, time_limit=0.1,
+                                      move_scores=solver_move_scores, workers=SOLVER_PROCESSES, split_spawns=True,
+                                      backend=solver_backend)
+else:
+    solver = ExpectimaxSearch(solver_evaluator, max_depth=3, min_probability=0.0001, time_limit=0.1,
+                              move_scores=solver_move_scores, backend=solver_backend)
+
+
+#  Finds the best move for a bitboard with an expectimax search over moves and random tile spawns
+def find_best_move(board):
+    return solver.find_best_move(board)
 
-        if new_board == board:
-            continue  # Skip invalid moves
 
-        score = evaluate(new_board)  # Evaluate only one move ahead
-        if score > best_score:
-            best_score = score
-            best_move = move
+# Worker object that searches for AI moves on a background thread so the window stays responsive
+class SolverWorker(QObject):
+    move_found = pyqtSignal(object, int)  # Best move direction (None if the game is over) and the request id
 
-    return best_move
+    # Find the best move for a bitboard and send it back with the id of the request
+    @pyqtSlot(object, int)
+    def search(self, board, request_id):
+        self.move_found.emit(find_best_move(board), request_id)
 
 
 # Dialog box object to show high scores
@@ -227,20 +180,24 @@ class HighScoresDialog(QDialog):
 
 # Main 2048 game class
 class TwentyFortyEight(QWidget):
+    move_requested = pyqtSignal(object, int)  # Asks the solver worker for a move (board, request id)
+
     def __init__(self):
         super().__init__()
 
         # Set game defaults
-        self.moves = 0
-        self.points = 0
-        self.move_history = []
         self.save_move_history = False
+        # Recordings hold 64-bit boards, so only 4x4 games are recorded
+        self.move_recorder = MoveRecorder(MOVE_HISTORY_FILE) if self.save_move_history and CELL_COUNT == 4 else None
         self.game_saved = False
-        self.__board = [[0 for _ in range(CELL_COUNT)] for _ in range(CELL_COUNT)]
+        self.score_store = HighScoreStore()  # Indexed high score table (imports scores.txt the first time)
+        self.__game = Game2048(backend=board_backend)  # Headless game that holds the board, score and move count
+        self.tile_pixmaps = {}  # Pre-rendered tiles keyed by (value, size, pixel ratio), so a new screen re-renders
+        self.drawn_tiles = None  # Tile values on screen, to repaint only the cells that change
+        if self.move_recorder:
+            self.move_recorder.start_game(self.__game.board)
 
         self.initUI()  # Initialize window properties
-        self.add_random_tile()  # Place first random tile
-        self.add_random_tile()  # Place second random tile
 
         # Reset game button
         self.reset_button = QPushButton("Restart", self)
@@ -264,7 +221,30 @@ class TwentyFortyEight(QWidget):
         self.ai_solve_button.setStyleSheet("""QPushButton {background-color: #E99999;
                              border-radius: 5px; font-size: 20px; font-family: "Verdana"}""")
         self.ai_solve_button.setCursor(Qt.PointingHandCursor)
-        self.ai_solve_button.clicked.connect(self.greedy_ai)
+        self.ai_solve_button.clicked.connect(self.toggle_ai)
+
+        # Stop AI button (only shown while the solver is running)
+        self.stop_ai_button = QPushButton("Stop AI", self)
+        self.stop_ai_button.setGeometry(602, 708, 140, 50)
+        self.stop_ai_button.setStyleSheet("""QPushButton {background-color: #999999;
+                             border-radius: 5px; font-size: 20px; font-family: "Verdana"}""")
+        self.stop_ai_button.setCursor(Qt.PointingHandCursor)
+        self.stop_ai_button.clicked.connect(self.stop_ai)
+        self.stop_ai_button.hide()
+
+        # Run the AI solver on a worker thread and apply its moves at a fixed animation rate
+        self.ai_move_delay = AI_MOVE_DELAY
+        self.ai_running = False
+        self.ai_paused = False
+        self.ai_request_id = 0  # Incremented whenever the AI is stopped so late results are ignored
+        self.pending_ai_move = None  # Move found while the AI was paused
+        self.ai_move_clock = QElapsedTimer()
+        self.solver_thread = QThread(self)
+        self.solver_worker = SolverWorker()
+        self.solver_worker.moveToThread(self.solver_thread)
+        self.move_requested.connect(self.solver_worker.search)
+        self.solver_worker.move_found.connect(self.schedule_ai_move)
+        self.solver_thread.start()
 
         # Set up label to display winner at end of match
         self.result_label = QLabel("Game Over!", self)
@@ -285,6 +265,16 @@ class TwentyFortyEight(QWidget):
 
         self.show()
 
+    # Current score of the game
+    @property
+    def points(self):
+        return self.__game.points
+
+    # Number of moves played in the game
+    @property
+    def moves(self):
+        return self.__game.moves
+
     # Initialize game window properties
     def initUI(self):
         self.setWindowTitle('2048')
@@ -293,222 +283,201 @@ class TwentyFortyEight(QWidget):
         self.setFocusPolicy(Qt.StrongFocus)
         self.setFocus()
 
-    # Render the game board and tiles
+    # Returns the cached pixmap of a tile, rendering it the first time a value is drawn at the current size
+    def tile_pixmap(self, value):
+        key = (value, CELL_SIZE, self.devicePixelRatioF())
+        if key not in self.tile_pixmaps:
+            self.tile_pixmaps[key] = render_tile(value, CELL_SIZE, key[2])
+        return self.tile_pixmaps[key]
+
+    # Returns the rectangle of the cell at the given row and column
+    def cell_rect(self, row, col):
+        x = GRID_ORIGINX + col * (CELL_SIZE + CELL_PADDING)
+        y = GRID_ORIGINY + row * (CELL_SIZE + CELL_PADDING)
+        return QRect(x, y, CELL_SIZE, CELL_SIZE)
+
+    # Schedule a repaint of the cells whose tiles changed since they were last drawn
+    def update_board(self):
+        grid = self.__game.grid()
+        if self.drawn_tiles is None:
+            self.update()
+        else:
+            for row in range(CELL_COUNT):
+                for col in range(CELL_COUNT):
+                    if grid[row][col] != self.drawn_tiles[row][col]:
+                        self.update(self.cell_rect(row, col))
+        self.drawn_tiles = grid
+
+    # Render the game board and tiles (one pixmap blit per cell that needs repainting)
     def paintEvent(self, event):
         qp = QPainter(self)  # Create a QPainter instance for rendering
+        dirty = event.rect()
 
         with qp:
-            # Iterate through each cell in the grid
+            grid = self.__game.grid()
             for row in range(CELL_COUNT):
                 for col in range(CELL_COUNT):
-                    value = self.__board[row][col]
-                    color = tile_colors.get(value, QColor(50, 50, 50))
-
-                    # Calculate tile position within the grid
-                    x = GRID_ORIGINX + col * (CELL_SIZE + CELL_PADDING)
-                    y = GRID_ORIGINY + row * (CELL_SIZE + CELL_PADDING)
-                    cell_rect = QRect(x, y, CELL_SIZE, CELL_SIZE)  # Define tile rectangle
-
-                    # Draw tile with rounded corners
-                    qp.setBrush(QBrush(color))
-                    qp.setPen(Qt.NoPen)  # Remove border outline
-                    qp.drawRoundedRect(cell_rect, CORNER_RADIUS, CORNER_RADIUS)
-
-                    # Draw tile value if it's not empty (0)
-                    if value:
-                        qp.setPen(get_text_color(value))
-                        qp.setFont(QFont('Montserrat Bold', 32, QFont.Bold))
-                        text = str(value)
-
-                        # Calculate text width and height for proper centering
-                        text_width = qp.fontMetrics().width(text)
-                        text_height = qp.fontMetrics().height()
-
-                        # Draw the tile value centered in the tile
-                        qp.drawText((x + (CELL_SIZE - text_width) // 2),
-                                    (y + (CELL_SIZE + text_height - CELL_PADDING) // 2), text)
+                    cell_rect = self.cell_rect(row, col)
+                    if cell_rect.intersects(dirty):
+                        qp.drawPixmap(cell_rect.topLeft(), self.tile_pixmap(grid[row][col]))
 
     # Handle player input for movement
     def keyPressEvent(self, event):
+        # Ignore manual moves while the AI is playing
+        if self.ai_running and event.key() != Qt.Key_Space:
+            return
+
         # Handle movement with both arrow keys and WASD
-        if event.key() in (Qt.Key_Left, Qt.Key_A):
-            self.move_tiles(Qt.Key_Left)
-            self.update()
-        elif event.key() in (Qt.Key_Right, Qt.Key_D):
-            self.move_tiles(Qt.Key_Right)
-            self.update()
-        elif event.key() in (Qt.Key_Up, Qt.Key_W):
-            self.move_tiles(Qt.Key_Up)
-            self.update()
-        elif event.key() in (Qt.Key_Down, Qt.Key_S):
-            self.move_tiles(Qt.Key_Down)
-            self.update()
+        if event.key() in KEY_TO_DIRECTION:
+            self.move_tiles(KEY_TO_DIRECTION[event.key()])
+            self.update_board()
         elif event.key() == Qt.Key_Space:
-            # Greedy algorithm
-            self.greedy_ai()
-
-    # Greedy algorithm to choose best move at the current state until game over
-    def greedy_ai(self):
-        while True:
-            best_move = find_best_move(self.__board)  # Get best move
-            if best_move:
-                self.move_tiles(best_move)
-                self.update()
-            else:
-                # Game over (no possible moves)
-                self.reset_button.setText("Play Again")
-                self.ai_solve_button.hide()
-                self.result_label.show()
-                break
+            # Start, pause or resume the AI solver
+            self.toggle_ai()
+
+    # Start the AI solver, or pause/resume it if it is already running
+    def toggle_ai(self):
+        if not self.ai_running:
+            self.ai_running = True
+            self.ai_paused = False
+            self.ai_solve_button.setText("Pause")
+            self.stop_ai_button.show()
+            self.ai_move_clock.start()
+            self.request_ai_move()
+        elif not self.ai_paused:
+            self.ai_paused = True
+            self.ai_solve_button.setText("Resume")
+        else:
+            self.ai_paused = False
+            self.ai_solve_button.setText("Pause")
+            # Play the move that arrived while paused
+            if self.pending_ai_move is not None:
+                move, self.pending_ai_move = self.pending_ai_move, None
+                self.apply_ai_move(move, self.ai_request_id)
+        self.setFocus()
+
+    # Cancel the AI solver and discard any move it is still computing
+    def stop_ai(self):
+        self.ai_running = False
+        self.ai_paused = False
+        self.ai_request_id += 1
+        self.pending_ai_move = None
+        self.ai_solve_button.setText("AI Solver")
+        self.stop_ai_button.hide()
+        self.setFocus()
+
+    # Ask the solver worker for the best move on the current board
+    def request_ai_move(self):
+        self.move_requested.emit(self.__game.board, self.ai_request_id)
+
+    # Wait out the rest of the animation delay before playing a move found by the solver
+    @pyqtSlot(object, int)
+    def schedule_ai_move(self, move, request_id):
+        remaining = max(0, self.ai_move_delay - self.ai_move_clock.elapsed())
+        QTimer.singleShot(remaining, lambda: self.apply_ai_move(move, request_id))
+
+    # Play a move found by the solver and request the next one
+    def apply_ai_move(self, move, request_id):
+        if not self.ai_running or request_id != self.ai_request_id:
+            return  # The AI was stopped (or the game reset) while this move was being computed
+        if self.ai_paused:
+            self.pending_ai_move = move
+            return
+
+        if move is None:
+            # Game over (no possible moves)
+            self.stop_ai()
+            self.reset_button.setText("Play Again")
+            self.ai_solve_button.hide()
+            self.result_label.show()
+            return
+
+        self.move_tiles(move)
+        self.update_board()
+        self.ai_move_clock.restart()
+        self.request_ai_move()
 
     # Move and merge tiles based on input direction
     def move_tiles(self, direction):
-
-        # Slide and merge tiles in a single row
-        def slide(row):
-            new_row = [value for value in row if value != 0]  # Remove empty tiles and shift values to the left
-            i = 0
-            while i < len(new_row) - 1:
-                # Merge adjacent tiles if they have the same value
-                if new_row[i] == new_row[i + 1]:
-                    new_row[i] *= 2  # Double the tile value
-                    self.points += new_row[i]  # Update score
-                    del new_row[i + 1]  # Remove merged tile
-                    new_row.append(0)  # Append zero to keep length consistent
-                i += 1
-            return new_row + [0] * (CELL_COUNT - len(new_row))  # Return the processed row with zero-padding at the end
-
-        rotated = False  # Track if board was transposed
-        original_board = self.__board  # Store board state to track change
-
-        # If moving up or down, transpose the board to treat columns as rows
-        if direction in (Qt.Key_Up, Qt.Key_Down):
-            self.__board = [list(x) for x in zip(*self.__board)]  # Transpose board
-            rotated = True  # Mark as rotated
-
-        # If moving right or down, reverse rows to work from right to left
-        if direction in (Qt.Key_Right, Qt.Key_Down):
-            self.__board = [list(reversed(row)) for row in self.__board]
-
-        # Process each row to slide and merge tiles
-        self.__board = [slide(row) for row in self.__board]
-
-        # Reverse rows back if they were reversed earlier
-        if direction in (Qt.Key_Right, Qt.Key_Down):
-            self.__board = [list(reversed(row)) for row in self.__board]
-
-        # If board was transposed, transpose it back to restore original structure
-        if rotated:
-            self.__board = [list(x) for x in zip(*self.__board)]
-
-        # Check if the board has changed
-        if original_board != self.__board:
-            self.moves += 1  # Increment move count
-            self.move_history.append((self.moves, self.points))  # Store the move number and points
-            self.add_random_tile()  # Add a random tile
+        # Slide and merge all rows (or columns) and add a random tile if the board has changed
+        if self.__game.move(direction):
+            if self.move_recorder:  # Record the move, the score and the tile that spawned
+                self.move_recorder.record_move(self.moves, direction, self.points, self.__game.last_spawn)
 
             # Update the score and move labels
             self.score_label.setText(f"Score: {self.points}")
             self.moves_label.setText(f"Moves: {self.moves}")
         else:
-            # Check if there are any possible merges horizontally or vertically
-            for r in range(CELL_COUNT):
-                for c in range(CELL_COUNT):
-                    # Check horizontal merge
-                    if c < CELL_COUNT - 1 and self.__board[r][c] == self.__board[r][c + 1]:
-                        return  # There's still a possible move (horizontal merge)
-                    # Check vertical merge
-                    if r < CELL_COUNT - 1 and self.__board[r][c] == self.__board[r + 1][c]:
-                        return  # There's still a possible move (vertical merge)
+            # Check if any direction can still slide or merge tiles
+            if not self.__game.is_game_over():
+                return  # There's still a possible move
 
             # Game over (no possible moves)
             self.reset_button.setText("Play Again")
             self.ai_solve_button.hide()
             self.result_label.show()
 
-            # Save the score (one time only)
+            # Save the score and write out the recorded moves (one time only)
             if not self.game_saved:
                 self.save_score()
                 self.game_saved = True
-
-    # Add a 2 or 4 tile in a random empty tile
-    def add_random_tile(self):
-        # Get a list of all empty tiles
-        empty_cells = [(r, c) for r in range(CELL_COUNT) for c in range(CELL_COUNT) if self.__board[r][c] == 0]
-
-        # Check if an empty tile exists
-        if empty_cells:
-            # Set a 2 or 4 tile in a random empty tile
-            r, c = random.choice(empty_cells)
-            self.__board[r][c] = 2 if random.random() < 0.9 else 4
+                if self.move_recorder:
+                    self.move_recorder.flush()
 
     # Reset board and game variables
     def reset_game(self):
-        # Save move and point history
-        if self.save_move_history:
-            self.save_move_history_to_csv()
-        # Reset game variables
-        self.moves = 0
-        self.points = 0
-        self.move_history = []
+        self.stop_ai()  # Cancel the AI solver if it is running
+
+        # Reset game variables and configure a random start state
+        self.__game.reset()
         self.game_saved = False
-        self.__board = [[0 for _ in range(CELL_COUNT)] for _ in range(CELL_COUNT)]
+        if self.move_recorder:
+            self.move_recorder.start_game(self.__game.board)
 
         # Reset text elements
         self.result_label.hide()
         self.ai_solve_button.show()
         self.score_label.setText("Score: 0")
         self.moves_label.setText("Moves: 0")
-
-        # Reconfigure a random start state
-        self.add_random_tile()
-        self.add_random_tile()
         self.setFocus()
-        self.update()
-
-    # Save score and date/time in a txt file
+        self.update_board()
+
+    # Stop the solver thread when the window closes
+    def closeEvent(self, event):
+        try:
+            self.stop_ai()
+            self.solver_thread.quit()
+            self.solver_thread.wait()
+            if SOLVER_PROCESSES > 1:
+                solver.close()  # Shut down the solver's worker processes
+        finally:
+            if self.move_recorder:
+                self.move_recorder.close()  # Write out the last buffered moves even if shutting down failed
+        super().closeEvent(event)
+
+    # Save score, moves and date/time in the high score store
     def save_score(self):
         current_time = datetime.now()
         formatted_time = current_time.strftime("%Y-%m-%d -- %H:%M:%S")
-        with open("scores.txt", "a") as file:
-            file.write(f"{self.points},{self.moves},{formatted_time}\n")
+        self.score_store.add_score(self.points, self.moves, formatted_time)
 
-    # Load all scores and dates/times for score txt file and return a sorted list (descending)
+    # Load the top ten scores and dates/times from the high score store (descending)
     def load_scores(self):
-        if not os.path.exists("scores.txt"):
-            return []
-        with open("scores.txt", "r") as file:
-            scores = []
-            # Parse the txt file to gather scores and dates/times
-            for line in file:
-                parts = line.strip().split(",")
-                if len(parts) == 3 and parts[0].isdigit():
-                    score = int(parts[0])
-                    moves = int(parts[1])
-                    timestamp = parts[2]
-                    scores.append((score, moves, timestamp))
-        return sorted(scores, key=lambda x: x[0], reverse=True)  # Return sorted list (descending) by score
+        return self.score_store.top_scores(10)
 
     # Create the high scores dialog box and display the top ten high scores
     def display_high_scores(self):
-        scores = self.load_scores()
-        top_scores = scores[:10]
+        top_scores = self.load_scores()
         dialog = HighScoresDialog(self, top_scores)
         dialog.exec_()
 
-    # Save the move and point history for the game to a csv (overwrites)
-    def save_move_history_to_csv(self, filename="moves.csv"):
-        with open(filename, mode='w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(["Move Number", "Score"])  # CSV header
-
-            # Write each move and the score
-            for move, score in self.move_history:
-                writer.writerow([move, score])
-        print(f"Move history saved to {filename}")
-
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     game = TwentyFortyEight()
-    sys.exit(app.exec_())
+    try:
+        exit_code = app.exec_()
+    finally:
+        if game.move_recorder:
+            game.move_recorder.close()  # The window may not get a closeEvent if the application exits on an error
+    sys.exit(exit_code)